@@ -0,0 +1,128 @@
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+
+import pandas as pd
+
+from feature_encoder import FeatureEncoder
+from forest_engine import CompiledForest
+from model_bundle import load_bundle
+
+
+class ModelArtifacts:
+    """The encoder and forest a scorer needs, plus the identity of the model they came from.
+
+    ``model`` is the unpickled RandomForestClassifier and ``forest`` its CompiledForest;
+    at least one is set. Bundles only carry the compiled forest. ``explainer`` is the
+    CompiledForest used for per-feature explanations, if they were requested; its
+    path deltas are built by the first explanation, so loading (and every worker
+    process that never explains) skips them.
+    ``source`` holds the load_artifacts arguments, so a worker process can load the
+    same model.
+    """
+
+    def __init__(self, feature_encoder, model_hash, version, model=None, forest=None, encoders=None, scaler=None,
+                 explainer=None):
+        self.feature_encoder = feature_encoder
+        self.model_hash = model_hash
+        self.version = version
+        self.model = model
+        self.forest = forest
+        self.encoders = encoders
+        self.scaler = scaler
+        self.explainer = explainer
+        self.source = None
+
+    def probabilities(self, rows):
+        """Churn probability for each encoded row"""
+        if self.forest is not None:
+            return self.forest.predict_proba(rows)
+        input_df = pd.DataFrame(rows, columns=self.feature_encoder.columns)
+        return self.model.predict_proba(input_df)[:, 1]
+
+    def explain(self, rows):
+        """(bias, per-feature contributions) for encoded rows; see CompiledForest.explain"""
+        if self.explainer is None:
+            raise RuntimeError("explanations were not enabled when the artifacts were loaded")
+        return self.explainer.explain(rows)
+
+
+def load_pickles(model_dir='.', compile_forest=False, explain=False, model_name='best_model.pkl'):
+    """best_model.pkl, encoder.pkl and scaler.pkl from model_dir, as the notebook writes them.
+
+    model_name picks another classifier trained on the same encoding, such as the
+    notebook's XGBClassifier. Only scikit-learn forests can be compiled or explained.
+    """
+    with open(os.path.join(model_dir, model_name), 'rb') as model_file:
+        model_bytes = model_file.read()
+    model = pickle.loads(model_bytes)
+    model_hash = hashlib.sha256(model_bytes).hexdigest()
+    with open(os.path.join(model_dir, 'encoder.pkl'), 'rb') as encoders_file:
+        encoders = pickle.load(encoders_file)
+    with open(os.path.join(model_dir, 'scaler.pkl'), 'rb') as scaler_file:
+        scaler = pickle.load(scaler_file)
+
+    # Dict/array form of the encoders and scaler, built once for the request path
+    feature_encoder = FeatureEncoder.from_artifacts(encoders, scaler)
+    # Other classifiers (e.g. XGBoost) are served without explanations
+    explain = explain and all(hasattr(tree, 'tree_') for tree in getattr(model, 'estimators_', [None]))
+    forest = CompiledForest.from_sklearn(model) if compile_forest or explain else None
+    return ModelArtifacts(feature_encoder, model_hash, model_hash[:12], model=model,
+                          forest=forest if compile_forest else None, encoders=encoders, scaler=scaler,
+                          explainer=forest if explain else None)
+
+
+def load_model_bundle(bundle_dir, explain=False):
+    # Memory-mapped bundle: only the compiled forest is available
+    forest, feature_encoder, manifest = load_bundle(bundle_dir)
+    return ModelArtifacts(feature_encoder, manifest['model_hash'], manifest['version'], forest=forest,
+                          explainer=forest if explain else None)
+
+
+def load_artifacts(bundle_dir=None, model_dir='.', compile_forest=False, explain=False, model_name='best_model.pkl'):
+    if bundle_dir:
+        artifacts = load_model_bundle(bundle_dir, explain)
+    else:
+        artifacts = load_pickles(model_dir, compile_forest, explain, model_name)
+    artifacts.source = (bundle_dir, model_dir, compile_forest, explain, model_name)
+    return artifacts
+
+
+# Artifacts of a pool worker process, keyed on their source. init_worker loads the
+# first; a model reload in the backend sends jobs for a new source, which the worker
+# loads on first use. The two most recent are kept for jobs still on the old one.
+_worker_artifacts = OrderedDict()
+_WORKER_MODELS = 2
+
+
+def init_worker(bundle_dir=None, model_dir='.', compile_forest=False, explain=False, model_name='best_model.pkl'):
+    """ProcessPoolExecutor initializer: load this worker's artifacts"""
+    _worker_load((bundle_dir, model_dir, compile_forest, explain, model_name))
+
+
+def _worker_load(source):
+    artifacts = _worker_artifacts.get(source)
+    if artifacts is None:
+        artifacts = _worker_artifacts[source] = load_artifacts(*source)
+        while len(_worker_artifacts) > _WORKER_MODELS:
+            _worker_artifacts.popitem(last=False)
+    _worker_artifacts.move_to_end(source)
+    return artifacts
+
+
+def worker_artifacts():
+    """The artifacts this worker loaded most recently"""
+    return next(reversed(_worker_artifacts.values()))
+
+
+def worker_probabilities(rows, source=None):
+    return (_worker_load(source) if source else worker_artifacts()).probabilities(rows)
+
+
+def worker_explain(rows, source=None):
+    return (_worker_load(source) if source else worker_artifacts()).explain(rows)
+
+
+def worker_encode(records, source=None):
+    return (_worker_load(source) if source else worker_artifacts()).feature_encoder.encode_records(records)
@@ -0,0 +1,218 @@
+"""Append-only audit log of every scored record, kept off the request path.
+
+Request handlers call ``AuditLog.record``, which only queues the request. If the
+bounded queue is full, the request is dropped and counted instead of blocking the
+caller. A background task collects queued requests into batches and writes them
+from a worker thread. Each batch goes into a SQLite database in WAL mode, one file
+per UTC day: ``<directory>/audit-YYYY-MM-DD.sqlite``.
+
+Read a day back:
+
+    python audit_log.py 2026-10-18 --dir audit
+    python audit_log.py 2026-10-18 --dir audit --model-version 3f2a9c01d4e7 --csv churners.csv --prediction Churn
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    ts REAL NOT NULL,
+    request_id TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    row_index INTEGER NOT NULL,
+    features TEXT NOT NULL,
+    probability REAL,
+    prediction TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS predictions_ts ON predictions (ts);
+"""
+
+INSERT = "INSERT INTO predictions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+def day_path(directory, day):
+    return os.path.join(directory, f"audit-{day}.sqlite")
+
+
+class AuditLog:
+    def __init__(self, directory, threshold, max_queue=10000, batch_size=500, flush_interval=1.0):
+        self.directory = directory
+        self.threshold = threshold
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written_rows = 0
+        self.dropped_requests = 0
+        self.dropped_rows = 0
+        self.failed_rows = 0
+        self._queue = None
+        self._task = None
+        self._pending = []
+        self._writing = None
+        self._day = None
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._queue = asyncio.Queue(self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Write everything still queued, then close the current day's database"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._writing is not None:
+            await asyncio.gather(self._writing, return_exceptions=True)
+        batch, self._pending = self._pending, []
+        while self._queue is not None and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        if batch:
+            await asyncio.to_thread(self._write, batch)
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def record(self, request_id, endpoint, model_version, records, probabilities, errors=None):
+        """Queue one scored request: its records, their probabilities and {row: error}"""
+        if self._queue is None or self._queue.full():
+            self.dropped_requests += 1
+            self.dropped_rows += len(records)
+            return
+        self._queue.put_nowait((time.time(), request_id, endpoint, model_version, records, probabilities,
+                                errors or {}))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._pending.append(await self._queue.get())
+            deadline = loop.time() + self.flush_interval
+            while len(self._pending) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            batch, self._pending = self._pending, []
+            # Shielded so stop() can cancel the loop without abandoning a write halfway
+            self._writing = asyncio.ensure_future(asyncio.to_thread(self._write, batch))
+            await asyncio.shield(self._writing)
+            self._writing = None
+
+    def _rows(self, entry):
+        ts, request_id, endpoint, model_version, records, probabilities, errors = entry
+        for row, record in enumerate(records):
+            error = errors.get(row)
+            probability = None if error is not None else float(probabilities[row])
+            if probability is not None and math.isnan(probability):
+                probability = None
+            prediction = None if probability is None else ("Churn" if probability > self.threshold else "No Churn")
+            yield (ts, request_id, endpoint, model_version, row, json.dumps(record, default=str), probability,
+                   prediction, error)
+
+    def _open(self, day):
+        if day != self._day:
+            if self._connection is not None:
+                self._connection.close()
+            connection = sqlite3.connect(day_path(self.directory, day), check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._connection, self._day = connection, day
+        return self._connection
+
+    def _write(self, batch):
+        by_day = {}
+        for entry in batch:
+            day = datetime.fromtimestamp(entry[0], timezone.utc).date().isoformat()
+            by_day.setdefault(day, []).extend(self._rows(entry))
+        for day, rows in by_day.items():
+            try:
+                with self._lock:
+                    connection = self._open(day)
+                    with connection:
+                        connection.executemany(INSERT, rows)
+                self.written_rows += len(rows)
+            except Exception:
+                self.failed_rows += len(rows)
+
+    def stats(self):
+        return {
+            "directory": self.directory,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "written_rows": self.written_rows,
+            "dropped_requests": self.dropped_requests,
+            "dropped_rows": self.dropped_rows,
+            "failed_rows": self.failed_rows,
+        }
+
+
+def read_day(directory, day, start=None, end=None, model_version=None, prediction=None, limit=None):
+    """One UTC day's audit rows as a DataFrame, optionally filtered by time, model version or prediction"""
+    path = day_path(directory, day)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"no audit log for {day} in {directory}")
+    clauses, params = [], []
+    for clause, value in (("ts >= ?", start), ("ts < ?", end), ("model_version = ?", model_version),
+                          ("prediction = ?", prediction)):
+        if value is not None:
+            clauses.append(clause)
+            params.append(value)
+    query = "SELECT * FROM predictions" + (" WHERE " + " AND ".join(clauses) if clauses else "") + " ORDER BY ts"
+    if limit is not None:
+        query += f" LIMIT {int(limit)}"
+    # Read-only, so a running backend can keep writing to the same file
+    with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as connection:
+        frame = pd.read_sql_query(query, connection, params=params)
+    frame['ts'] = pd.to_datetime(frame['ts'], unit='s', utc=True)
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('day', help="UTC date, YYYY-MM-DD")
+    parser.add_argument('--dir', default=os.environ.get('AUDIT_LOG_DIR', 'audit'))
+    parser.add_argument('--model-version')
+    parser.add_argument('--prediction', choices=['Churn', 'No Churn'])
+    parser.add_argument('--limit', type=int)
+    parser.add_argument('--csv', help="write the matching rows, with their features expanded, to this file")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    frame = read_day(args.dir, args.day, model_version=args.model_version, prediction=args.prediction,
+                     limit=args.limit)
+    elapsed = time.perf_counter() - started
+    print(f"{len(frame)} rows from {frame['request_id'].nunique()} requests in {elapsed * 1000:.0f} ms")
+    if len(frame):
+        scored = frame['probability'].notna()
+        print(frame.groupby(['model_version', 'endpoint']).agg(
+            rows=('row_index', 'size'), churn=('prediction', lambda labels: (labels == 'Churn').sum()),
+            errors=('error', 'count'), mean_probability=('probability', 'mean')).to_string())
+        print(f"{int((~scored).sum())} rows with errors, from {frame['ts'].min()} to {frame['ts'].max()}")
+    if args.csv:
+        features = pd.json_normalize(frame['features'].map(json.loads).tolist())
+        frame.drop(columns=['features']).join(features).to_csv(args.csv, index=False)
+        print(f"wrote {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
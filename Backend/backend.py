@@ -1,19 +1,245 @@
-from fastapi import FastAPI, Form
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from fastapi import BackgroundTasks, FastAPI, Form, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import pandas as pd
-import pickle
-
-# Load model, encoders, and scaler
-with open('best_model.pkl', 'rb') as model_file:
-    loaded_model = pickle.load(model_file)
-with open('encoder.pkl', 'rb') as encoders_file:
-    encoders = pickle.load(encoders_file)
-with open('scaler.pkl', 'rb') as scaler_file:
-    scaler_data = pickle.load(scaler_file)
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import Any, Dict, List, Optional, Union
+import asyncio
+import hashlib
+import json
+import numpy as np
+import os
+import random
+import secrets
+import time
+import uuid
+
+from artifacts import init_worker, load_artifacts, worker_encode, worker_explain, worker_probabilities
+from audit_log import AuditLog
+from config import (AB_WEIGHT, ADMIN_TOKEN, AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL, AUDIT_LOG_DIR, AUDIT_QUEUE_SIZE,
+                    CHURN_THRESHOLD, DRIFT_REFERENCE, DRIFT_WINDOW, EXPLANATIONS_ENABLED,
+                    INFERENCE_EXECUTOR,
+                    INFERENCE_QUEUE_SIZE, INFERENCE_WORKERS, MICRO_BATCH_ENABLED, MICRO_BATCH_MAX_SIZE,
+                    MICRO_BATCH_MAX_WAIT_MS, MODEL_BUNDLE, MODEL_REGISTRY, MODEL_RELOAD_INTERVAL, PREDICTION_CACHE_SIZE,
+                    PREDICTION_CACHE_TTL, SECONDARY_MODE, SECONDARY_MODEL, SHADOW_LOG, SHADOW_SAMPLE_RATE,
+                    USE_COMPILED_FOREST, WHATIF_MAX_ROWS)
+from drift_monitor import DriftMonitor
+from inference_executor import ExecutorBusy, InferenceExecutor
+from metrics import Counter, Gauge, Histogram, MetricsRegistry
+from micro_batcher import MicroBatcher
+from model_registry import ModelRegistry
+from prediction_cache import PredictionCache, canonical_key
+from response_formats import JSON, columnar_body, negotiate, negotiated_response
+from shadow import ShadowLog, shadow_score
+from whatif import grid_rows
+
+# Load model, encoders, and scaler. ``artifacts`` is replaced as a whole when a new
+# registry version is swapped in; request handlers read it once and use that
+# snapshot throughout, so in-flight requests finish on the model they started with.
+registry = ModelRegistry(MODEL_REGISTRY) if MODEL_REGISTRY else None
+artifacts = load_artifacts(registry.path(registry.active_version()) if registry else MODEL_BUNDLE,
+                           compile_forest=USE_COMPILED_FOREST, explain=EXPLANATIONS_ENABLED)
+model_status = {"loaded_at": datetime.now(timezone.utc).isoformat(), "reloads": 0, "error": None}
+
+def build_drift_monitor(feature_encoder):
+    """Drift monitor in the encoded space of feature_encoder, or None without reference data"""
+    if not DRIFT_REFERENCE or not os.path.exists(DRIFT_REFERENCE):
+        return None
+    return DriftMonitor.from_csv(feature_encoder, DRIFT_REFERENCE, DRIFT_WINDOW)
+
+# Every scored record, written to disk in batches off the request path
+audit_log = (AuditLog(AUDIT_LOG_DIR, CHURN_THRESHOLD, AUDIT_QUEUE_SIZE, AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL)
+             if AUDIT_LOG_DIR else None)
+
+# Live /predict inputs against the training data; rebuilt with the encoder on reload
+drift_monitor = build_drift_monitor(artifacts.feature_encoder)
+
+# Second model compared against the served one, in shadow or A/B mode (SECONDARY_MODEL)
+if SECONDARY_MODE not in ('shadow', 'ab'):
+    raise ValueError(f"SECONDARY_MODE must be 'shadow' or 'ab', not {SECONDARY_MODE!r}")
+secondary = None
+if SECONDARY_MODEL:
+    # A/B traffic includes /explain, so the secondary explains too where its model allows
+    secondary_explain = EXPLANATIONS_ENABLED and SECONDARY_MODE == 'ab'
+    secondary = (load_artifacts(SECONDARY_MODEL, explain=secondary_explain) if os.path.isdir(SECONDARY_MODEL) else
+                 load_artifacts(model_dir=os.path.dirname(SECONDARY_MODEL) or '.',
+                                model_name=os.path.basename(SECONDARY_MODEL), explain=secondary_explain))
+shadow_log = ShadowLog(SHADOW_LOG) if secondary is not None and SECONDARY_MODE == 'shadow' else None
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL) if PREDICTION_CACHE_SIZE > 0 else None
+
+# Request and per-stage inference metrics, served on /metrics
+metrics_registry = MetricsRegistry()
+request_count = metrics_registry.register(
+    Counter('churn_http_requests_total', 'HTTP requests by route and status code', ('path', 'status')))
+request_errors = metrics_registry.register(
+    Counter('churn_http_errors_total', 'HTTP requests that failed with a 5xx status or an exception', ('path',)))
+request_seconds = metrics_registry.register(
+    Histogram('churn_http_request_duration_seconds', 'Time spent handling HTTP requests', ('path',)))
+stage_seconds = metrics_registry.register(
+    Histogram('churn_inference_stage_seconds',
+              'Time spent in each inference stage: parse_validate, encode, cache_lookup, queue_wait, forest',
+              ('stage',)))
+rows_scored = metrics_registry.register(
+    Counter('churn_rows_scored_total', 'Rows scored by the forest, excluding cache hits'))
+metrics_registry.register(
+    Gauge('churn_feature_psi', 'Population stability index of each input field against the training data',
+          lambda: {(col,): feature["psi"] for col, feature in
+                   (drift_monitor.report()["features"] if drift_monitor is not None else {}).items()},
+          ('feature',)))
+if audit_log is not None:
+    metrics_registry.register(
+        Gauge('churn_audit_rows_total', 'Scored records for the audit log by outcome',
+              lambda: {('written',): audit_log.written_rows, ('dropped',): audit_log.dropped_rows,
+                       ('failed',): audit_log.failed_rows}, ('outcome',), kind='counter'))
+    metrics_registry.register(
+        Gauge('churn_audit_queue_depth', 'Requests waiting for the audit log writer', lambda: audit_log.stats()["queued"]))
+metrics_registry.register(
+    Gauge('churn_model_info', 'Model currently being served', lambda: {(artifacts.version, artifacts.model_hash): 1},
+          ('version', 'model_hash')))
+
+model_reloads = metrics_registry.register(
+    Counter('churn_model_reloads_total', 'Model reload attempts by outcome', ('outcome',)))
+shadow_requests = metrics_registry.register(
+    Counter('churn_shadow_requests_total', 'Sampled requests scored by the shadow model, by outcome', ('outcome',)))
+ab_requests = metrics_registry.register(
+    Counter('churn_ab_requests_total', 'Scoring requests by A/B arm', ('arm',)))
+
+def observe_executor_job(wait, duration, fn):
+    stage_seconds.observe(wait, 'queue_wait')
+    # Batch encoding jobs are timed by the handlers' 'encode' stage
+    if fn.__name__ not in ('encode_records', 'worker_encode'):
+        stage_seconds.observe(duration, 'forest')
+
+# Forest scoring for API requests runs here, off the event loop. Worker processes
+# load the model named by each job's artifacts.source, so they follow reloads too.
+if INFERENCE_EXECUTOR == 'process':
+    inference_executor = InferenceExecutor('process', INFERENCE_WORKERS, INFERENCE_QUEUE_SIZE,
+                                           initializer=init_worker, initargs=artifacts.source,
+                                           observer=observe_executor_job)
+else:
+    inference_executor = InferenceExecutor(INFERENCE_EXECUTOR, INFERENCE_WORKERS, INFERENCE_QUEUE_SIZE,
+                                           observer=observe_executor_job)
+
+# The shadow model gets one thread of its own; samples arriving while 16 are already
+# pending are dropped, so shadow scoring can never hold up served traffic
+shadow_executor = InferenceExecutor('thread', 1, 16) if shadow_log is not None else None
+
+async def compute_probabilities(current, rows):
+    if inference_executor.kind == 'process':
+        return await inference_executor.run(worker_probabilities, rows, current.source)
+    return await inference_executor.run(current.probabilities, rows)
+
+async def compute_explanations(current, rows):
+    if inference_executor.kind == 'process':
+        return await inference_executor.run(worker_explain, rows, current.source)
+    return await inference_executor.run(current.explain, rows)
+
+async def compute_encoding(current, records):
+    if inference_executor.kind == 'process':
+        return await inference_executor.run(worker_encode, records, current.source)
+    return await inference_executor.run(current.feature_encoder.encode_records, records)
+
+metrics_registry.register(
+    Gauge('churn_inference_queue_depth', 'Inference jobs pending on the executor', lambda: inference_executor.pending))
+metrics_registry.register(
+    Gauge('churn_inference_rejected_total', 'Requests shed with a 503 because the inference queue was full',
+          lambda: inference_executor.rejected, kind='counter'))
+if prediction_cache is not None:
+    metrics_registry.register(
+        Gauge('churn_prediction_cache_events_total', 'Prediction cache lookups and removals by outcome',
+              lambda: {('hit',): prediction_cache.hits, ('miss',): prediction_cache.misses,
+                       ('eviction',): prediction_cache.evictions}, ('outcome',), kind='counter'))
+
+# Record scored once at startup so the first real request doesn't pay for cold
+# caches or pool start-up; /ready reports 503 until it has gone through
+WARMUP_RECORD = {
+    "gender": "Male", "SeniorCitizen": 0, "Partner": "Yes", "Dependents": "No", "tenure": 12,
+    "PhoneService": "Yes", "MultipleLines": "No", "InternetService": "DSL", "OnlineSecurity": "Yes",
+    "OnlineBackup": "Yes", "DeviceProtection": "No", "TechSupport": "No", "StreamingTV": "No",
+    "StreamingMovies": "No", "Contract": "One year", "PaperlessBilling": "No",
+    "PaymentMethod": "Credit card (automatic)", "MonthlyCharges": 45.0, "TotalCharges": 540.0,
+}
+readiness = {"warmed_up": False, "error": None}
+
+async def warm_up():
+    try:
+        await compute_probabilities(artifacts, artifacts.feature_encoder.encode(WARMUP_RECORD)[None, :])
+        readiness["warmed_up"], readiness["error"] = True, None
+    except Exception as exc:
+        readiness["error"] = f"warm-up inference failed: {exc!r}"
+
+reload_lock = asyncio.Lock()
+
+async def reload_model(version=None):
+    """Swap in version, or the registry's active version, if it is not the one being served.
+
+    The new version is loaded off the event loop and warmed up before the swap;
+    until then, and if anything fails, requests keep using the current model. A
+    version given explicitly is only written to ACTIVE once it has been swapped in,
+    so a broken version never becomes the one the watcher and the next start load.
+    A version missing from the registry (KeyError) is a failed reload like any other.
+    Returns True if the model changed.
+    """
+    global artifacts, drift_monitor
+    async with reload_lock:
+        activate = version is not None
+        try:
+            version = version if activate else registry.active_version()
+            bundle_dir = registry.path(version)
+            if version == artifacts.version:
+                if activate:
+                    registry.activate(version)
+                return False
+            loaded = await asyncio.to_thread(load_artifacts, bundle_dir,
+                                             compile_forest=USE_COMPILED_FOREST, explain=EXPLANATIONS_ENABLED)
+            await compute_probabilities(loaded, loaded.feature_encoder.encode(WARMUP_RECORD)[None, :])
+            monitor = await asyncio.to_thread(build_drift_monitor, loaded.feature_encoder)
+        except Exception as exc:
+            model_reloads.inc('failed')
+            model_status["error"] = f"loading version {version!r} failed: {exc!r}"
+            raise
+        artifacts, drift_monitor = loaded, monitor
+        if activate:
+            registry.activate(version)
+        model_reloads.inc('swapped')
+        model_status.update(loaded_at=datetime.now(timezone.utc).isoformat(), reloads=model_status["reloads"] + 1,
+                            error=None)
+        return True
+
+async def watch_registry():
+    """Reload whenever the registry's ACTIVE version changes"""
+    while True:
+        await asyncio.sleep(MODEL_RELOAD_INTERVAL)
+        try:
+            await reload_model()
+        except Exception:
+            # Recorded in model_status; the current model keeps serving
+            pass
+
+@asynccontextmanager
+async def lifespan(app):
+    await warm_up()
+    if micro_batcher is not None:
+        micro_batcher.start()
+    if audit_log is not None:
+        audit_log.start()
+    watcher = asyncio.create_task(watch_registry()) if registry and MODEL_RELOAD_INTERVAL > 0 else None
+    yield
+    if watcher is not None:
+        watcher.cancel()
+        await asyncio.gather(watcher, return_exceptions=True)
+    if micro_batcher is not None:
+        await micro_batcher.stop()
+    if audit_log is not None:
+        await audit_log.stop()
+    inference_executor.shutdown()
+    if shadow_executor is not None:
+        shadow_executor.shutdown()
 
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 
 # Defining CORS 
@@ -27,18 +253,82 @@ app.add_middleware(
     allow_headers=['*'],
 )
 
-def make_prediction(input_data):
-    input_df = pd.DataFrame([input_data])
+# Compress larger responses (batch results) for clients that accept gzip;
+# /predict/batch compresses with zstd itself when the client accepts it
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    request.state.started = time.perf_counter()
+    request.state.request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Request-ID"] = request.state.request_id
+        # Scoring endpoints record the version they used; anything else gets the current one
+        response.headers["X-Model-Version"] = getattr(request.state, "model_version", artifacts.version)
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        request_seconds.observe(time.perf_counter() - request.state.started, path)
+        request_count.inc(path, str(status))
+        if status >= 500:
+            request_errors.inc(path)
+
+def cache_lookup(current, rows):
+    """Cache keys for rows, their cached probabilities and the positions still to be scored"""
+    keys = [canonical_key(row) for row in rows]
+    probabilities = np.empty(len(rows), dtype=np.float64)
+    missing = []
+    for position, key in enumerate(keys):
+        probability = prediction_cache.get(key, current.model_hash)
+        if probability is None:
+            missing.append(position)
+        else:
+            probabilities[position] = probability
+    return keys, probabilities, missing
+
+def cache_store(current, keys, probabilities, missing):
+    for position in missing:
+        prediction_cache.put(keys[position], probabilities[position], current.model_hash)
 
-    for col, encoder in encoders.items():
-        input_df[col] = encoder.transform(input_df[col])
+def label_results(probabilities):
+    return [("Churn" if probability > CHURN_THRESHOLD else "No Churn", float(probability))
+            for probability in probabilities]
 
-    numerical_cols = ['tenure', 'MonthlyCharges', 'TotalCharges']
-    input_df[numerical_cols] = scaler_data.transform(input_df[numerical_cols])
+async def score_async(rows, current):
+    """Churn probabilities from a single walk over the forest, using prediction_cache.
 
-    prediction = loaded_model.predict(input_df)[0]
-    probability = loaded_model.predict_proba(input_df)[0, 1]
-    return "Churn" if prediction == 1 else "No Churn", probability
+    The walk runs on inference_executor. check_parity and benchmark_inference call this
+    directly, so they check and time the path the endpoints serve.
+    """
+    # The cache holds one model's results; A/B traffic to the secondary bypasses it
+    if prediction_cache is None or current is secondary:
+        rows_scored.inc(amount=len(rows))
+        return await compute_probabilities(current, rows)
+
+    with stage_seconds.time('cache_lookup'):
+        keys, probabilities, missing = cache_lookup(current, rows)
+    if missing:
+        rows_scored.inc(amount=len(missing))
+        probabilities[missing] = await compute_probabilities(current, rows[missing])
+        cache_store(current, keys, probabilities, missing)
+    return probabilities
+
+# Concurrent /predict calls share one score_async call per batch
+micro_batcher = (MicroBatcher(score_async, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS / 1000)
+                 if MICRO_BATCH_ENABLED else None)
+
+def contribution_list(columns, record, contributions):
+    """Features with their input value and contribution, largest increase in churn risk first"""
+    ranked = sorted(zip(columns, contributions), key=lambda item: item[1], reverse=True)
+    return [{"feature": col, "value": record[col], "contribution": float(contribution)}
+            for col, contribution in ranked]
+
+def format_validation_error(exc):
+    return "; ".join(f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in exc.errors())
 
 class PredictionRequest(BaseModel):
     gender: str
@@ -61,8 +351,346 @@ class PredictionRequest(BaseModel):
     MonthlyCharges: float
     TotalCharges: float
 
+class BatchPredictionRequest(BaseModel):
+    records: List[Dict[str, Any]]
+
+class NumericRange(BaseModel):
+    start: float
+    stop: float
+    steps: int = Field(21, ge=1, le=WHATIF_MAX_ROWS)
+
+class WhatIfRequest(BaseModel):
+    customer: PredictionRequest
+    # Field -> a range of numbers, or the list of values to try
+    variations: Dict[str, Union[NumericRange, List[Any]]]
+    derive_total_charges: bool = False
+
+def require_explanations():
+    if not EXPLANATIONS_ENABLED:
+        raise HTTPException(status_code=404, detail="Explanations are disabled (EXPLANATIONS_ENABLED=0)")
+
+async def encode_batch(current, records):
+    """Validate and encode raw records; returns (results with per-row errors, valid rows, their encoded rows).
+
+    The records that pass validation are encoded together with encode_frame, on the
+    inference executor.
+    """
+    results = [None] * len(records)
+    valid_rows, valid_records = [], []
+    for row, record in enumerate(records):
+        try:
+            valid_records.append(PredictionRequest(**record).dict())
+            valid_rows.append(row)
+        except ValidationError as exc:
+            results[row] = {"index": row, "error": format_validation_error(exc)}
+    if not valid_records:
+        return results, [], np.empty((0, len(current.feature_encoder.columns)))
+
+    encoded_rows, errors = await compute_encoding(current, valid_records)
+    for position, message in errors.items():
+        results[valid_rows[position]] = {"index": valid_rows[position], "error": message}
+    keep = [position for position in range(len(valid_rows)) if position not in errors]
+    return results, [valid_rows[position] for position in keep], encoded_rows[keep]
+
+@app.exception_handler(ExecutorBusy)
+async def executor_busy_handler(request: Request, exc: ExecutorBusy):
+    return JSONResponse(status_code=503, headers={"Retry-After": "1"},
+                        content={"detail": f"Prediction service overloaded: {exc}"})
+
+def routing_bucket(records):
+    """Position in [0, 1) of the customer record(s) of a request, from a hash of their JSON"""
+    digest = hashlib.sha256(json.dumps(records, sort_keys=True, default=str).encode()).digest()
+    return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+def serving_model(request, records):
+    """The artifacts this request is scored with, recorded for its X-Model-Version header.
+
+    In A/B mode an AB_WEIGHT fraction of customers goes to the secondary model. The arm
+    follows from the request's records, so /predict, /explain and /whatif for the same
+    customer are answered by the same model.
+    """
+    current = artifacts
+    if secondary is not None and SECONDARY_MODE == 'ab':
+        if routing_bucket(records) < AB_WEIGHT:
+            current = secondary
+        ab_requests.inc('secondary' if current is secondary else 'primary')
+    request.state.model_version = current.version
+    return current
+
+def require_explainer(current):
+    # In A/B mode the secondary may be a model that cannot be explained (e.g. XGBoost)
+    if current.explainer is None:
+        raise HTTPException(status_code=404, detail=f"Explanations are not available for model {current.version}")
+
+def observe_drift(current, rows):
+    # Rows encoded by another encoder (the A/B secondary's, or the previous model's
+    # right after a reload) would land in the wrong bins
+    if drift_monitor is not None and current.feature_encoder is drift_monitor.feature_encoder:
+        drift_monitor.update(rows)
+
+def audit(request, current, records, probabilities, errors=None):
+    if audit_log is not None:
+        audit_log.record(request.state.request_id, request.url.path, current.version, records, probabilities, errors)
+
+async def run_shadow(rows, probabilities, primary_version, primary_seconds, endpoint):
+    try:
+        await shadow_executor.run(shadow_score, secondary, shadow_log, rows, probabilities, primary_version,
+                                  primary_seconds, endpoint)
+        shadow_requests.inc('logged')
+    except ExecutorBusy:
+        shadow_requests.inc('dropped')
+    except Exception:
+        shadow_requests.inc('failed')
+
+def schedule_shadow(background_tasks, request, rows, probabilities, current):
+    """Sample this request for shadow scoring, which runs after the response has been sent"""
+    if shadow_log is None or random.random() >= SHADOW_SAMPLE_RATE:
+        return
+    primary_seconds = time.perf_counter() - request.state.started
+    background_tasks.add_task(run_shadow, rows, probabilities, current.version, primary_seconds, request.url.path)
+
 @app.post("/predict")
-async def predict(data: PredictionRequest):
+async def predict(data: PredictionRequest, request: Request, background_tasks: BackgroundTasks):
+    # Body parsing and pydantic validation happen before the handler is called
+    stage_seconds.observe(time.perf_counter() - request.state.started, 'parse_validate')
+    input_data = data.dict()
+    current = serving_model(request, input_data)
+    with stage_seconds.time('encode'):
+        try:
+            row = current.feature_encoder.encode(input_data)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+    observe_drift(current, row[None, :])
+    if micro_batcher is not None:
+        probabilities = [await micro_batcher.submit(row, current)]
+    else:
+        probabilities = await score_async(row[None, :], current)
+    schedule_shadow(background_tasks, request, row[None, :], probabilities, current)
+    audit(request, current, [input_data], probabilities)
+    prediction, probability = label_results(probabilities)[0]
+    return {"prediction": prediction, "probability": probability, "model_version": current.version}
+
+@app.post("/predict/batch")
+async def predict_batch(data: BatchPredictionRequest, request: Request, background_tasks: BackgroundTasks):
+    """Scores for many records, as JSON or a columnar Arrow / NPZ body (see response_formats)"""
+    media_type = negotiate(request.headers.get("accept"))
+    stage_seconds.observe(time.perf_counter() - request.state.started, 'parse_validate')
+    current = serving_model(request, data.records)
+    with stage_seconds.time('encode'):
+        results, valid_rows, rows = await encode_batch(current, data.records)
+    if len(rows):
+        observe_drift(current, rows)
+        probabilities = await score_async(rows, current)
+        schedule_shadow(background_tasks, request, rows, probabilities, current)
+    else:
+        probabilities = np.empty(0)
+    errors = {row: result["error"] for row, result in enumerate(results) if result is not None}
+    all_probabilities = np.full(len(results), np.nan)
+    all_probabilities[valid_rows] = probabilities
+    audit(request, current, data.records, all_probabilities, errors)
+
+    if media_type != JSON:
+        body = columnar_body(media_type, all_probabilities, all_probabilities > CHURN_THRESHOLD, errors,
+                             {"threshold": CHURN_THRESHOLD, "model_version": current.version})
+        return negotiated_response(request, media_type, body=body)
+
+    for row, (prediction, probability) in zip(valid_rows, label_results(probabilities)):
+        results[row] = {"index": row, "prediction": prediction, "probability": probability}
+    return negotiated_response(request, JSON, content={"model_version": current.version, "results": results})
+
+
+def whatif_axes(customer, variations, derive_total_charges):
+    """(field, values) per swept field, each value validated as PredictionRequest would"""
+    if not variations:
+        raise HTTPException(status_code=422, detail="variations: sweep at least one field")
+    if derive_total_charges and 'TotalCharges' in variations:
+        raise HTTPException(status_code=422, detail="TotalCharges cannot be swept when derive_total_charges is set")
+    # Checked on the specs, before any axis is built or validated
+    size = int(np.prod([spec.steps if isinstance(spec, NumericRange) else len(spec) for spec in variations.values()],
+                       dtype=object))
+    if size > WHATIF_MAX_ROWS:
+        raise HTTPException(status_code=422, detail=f"The grid has {size:,} combinations; "
+                                                    f"the limit is {WHATIF_MAX_ROWS:,} (WHATIF_MAX_ROWS)")
+    axes = []
+    for col, spec in variations.items():
+        if col not in customer:
+            raise HTTPException(status_code=422, detail=f"variations: unknown field {col!r}")
+        if isinstance(spec, NumericRange):
+            values = np.linspace(spec.start, spec.stop, spec.steps)
+            # Integer fields (tenure, SeniorCitizen) get whole numbers, without repeats
+            values = (np.unique(np.round(values)).astype(int) if isinstance(customer[col], int) else values).tolist()
+        else:
+            values = spec
+        if not values:
+            raise HTTPException(status_code=422, detail=f"variations.{col}: no values")
+        try:
+            values = [PredictionRequest(**{**customer, col: value}).dict()[col] for value in values]
+        except ValidationError as exc:
+            raise HTTPException(status_code=422, detail=f"variations: {format_validation_error(exc)}")
+        axes.append((col, values))
+    return axes
+
+@app.post("/whatif")
+async def whatif(data: WhatIfRequest, request: Request):
+    """Churn probability of one customer over a grid of changes to some of its fields.
+
+    Every combination of the variations is scored in a single forest pass, together
+    with the unchanged customer. ``probabilities`` is nested in the order of ``axes``.
+    The grid rows are synthetic, so they skip the prediction cache, drift monitor and
+    audit log.
+    """
+    customer = data.customer.dict()
+    current = serving_model(request, customer)
+    axes = whatif_axes(customer, data.variations, data.derive_total_charges)
+    with stage_seconds.time('encode'):
+        try:
+            rows, shape = grid_rows(current.feature_encoder, customer, axes, data.derive_total_charges)
+            base = current.feature_encoder.encode(customer)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+    rows_scored.inc(amount=len(rows) + 1)
+    probabilities = await compute_probabilities(current, np.vstack([rows, base]))
+    prediction, probability = label_results(probabilities[-1:])[0]
+    return {"model_version": current.version, "threshold": CHURN_THRESHOLD,
+            "customer": {"prediction": prediction, "probability": probability},
+            "axes": [{"feature": col, "values": values} for col, values in axes],
+            "probabilities": probabilities[:-1].reshape(shape).tolist()}
+
+
+@app.post("/explain")
+async def explain(data: PredictionRequest, request: Request):
+    """Prediction plus each feature's contribution to the churn probability.
+
+    Contributions follow the forest's decision paths: base_probability plus all
+    contributions equals the returned probability. The sum is rounded to 12 decimals
+    so float noise cannot move a probability across the decision threshold.
+    """
+    require_explanations()
     input_data = data.dict()
-    prediction, probability = make_prediction(input_data)
-    return {"prediction": prediction, "probability": probability}
\ No newline at end of file
+    current = serving_model(request, input_data)
+    require_explainer(current)
+    try:
+        row = current.feature_encoder.encode(input_data)[None, :]
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    observe_drift(current, row)
+    bias, contributions = await compute_explanations(current, row)
+    probability = round(bias + contributions[0].sum(), 12)
+    audit(request, current, [input_data], [probability])
+    prediction, probability = label_results([probability])[0]
+    return {"prediction": prediction, "probability": probability, "base_probability": bias,
+            "contributions": contribution_list(current.feature_encoder.columns, input_data, contributions[0]),
+            "model_version": current.version}
+
+@app.post("/explain/batch")
+async def explain_batch(data: BatchPredictionRequest, request: Request):
+    require_explanations()
+    current = serving_model(request, data.records)
+    require_explainer(current)
+    results, valid_rows, rows = await encode_batch(current, data.records)
+    bias = None
+    all_probabilities = np.full(len(results), np.nan)
+    if len(rows):
+        observe_drift(current, rows)
+        bias, contributions = await compute_explanations(current, rows)
+        probabilities = np.round(bias + contributions.sum(axis=1), 12)
+        all_probabilities[valid_rows] = probabilities
+        columns = current.feature_encoder.columns
+        for row, (prediction, probability), row_contributions in zip(
+                valid_rows, label_results(probabilities), contributions):
+            results[row] = {"index": row, "prediction": prediction, "probability": probability,
+                            "contributions": dict(zip(columns, row_contributions.tolist()))}
+    audit(request, current, data.records, all_probabilities,
+          {row: result["error"] for row, result in enumerate(results) if "error" in result})
+    return {"model_version": current.version, "base_probability": bias, "results": results}
+
+
+@app.get("/health")
+async def health():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness: artifacts are loaded and a warm-up inference has completed"""
+    body = {"status": "ready" if readiness["warmed_up"] else "not ready",
+            "model_version": artifacts.version, "warmed_up": readiness["warmed_up"]}
+    if readiness["error"]:
+        body["error"] = readiness["error"]
+    return JSONResponse(status_code=200 if readiness["warmed_up"] else 503, content=body)
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    if prediction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_cache.stats()}
+
+
+@app.get("/executor/stats")
+async def executor_stats():
+    return inference_executor.stats()
+
+
+@app.get("/audit/stats")
+async def audit_stats():
+    if audit_log is None:
+        return {"enabled": False}
+    return {"enabled": True, **audit_log.stats()}
+
+
+@app.get("/batcher/stats")
+async def batcher_stats():
+    if micro_batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **micro_batcher.stats()}
+
+
+@app.get("/drift")
+async def drift(min_rows: int = 100):
+    """Per-field PSI / KS of recent request inputs against the training data"""
+    if drift_monitor is None:
+        return {"enabled": False}
+    return {"enabled": True, **drift_monitor.report(min_rows)}
+
+
+@app.get("/model")
+async def model_info():
+    """The model being served and, with a registry, the versions available"""
+    body = {"model_version": artifacts.version, "model_hash": artifacts.model_hash, **model_status}
+    if secondary is not None:
+        body["secondary"] = {"mode": SECONDARY_MODE, "model_version": secondary.version,
+                             "model_hash": secondary.model_hash,
+                             "share": SHADOW_SAMPLE_RATE if SECONDARY_MODE == 'shadow' else AB_WEIGHT}
+    if registry is not None:
+        body["registry"] = {"root": registry.root, "active": registry.active_version(),
+                            "versions": [manifest["version"] for manifest in registry.versions()]}
+    return body
+
+
+def require_admin(token):
+    if ADMIN_TOKEN is None:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set)")
+    if token is None or not secrets.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.post("/admin/reload")
+async def admin_reload(version: Optional[str] = None, x_admin_token: Optional[str] = Header(None)):
+    """Swap version in (or re-read ACTIVE); version becomes ACTIVE only once it is serving"""
+    require_admin(x_admin_token)
+    if registry is None:
+        raise HTTPException(status_code=409, detail="No model registry configured (MODEL_REGISTRY)")
+    previous = artifacts.version
+    try:
+        swapped = await reload_model(version)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=str(exc.args[0]))
+    except Exception:
+        raise HTTPException(status_code=500, detail=model_status["error"])
+    return {"model_version": artifacts.version, "previous_version": previous, "swapped": swapped}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,76 @@
+"""Throughput of parallel bulk scoring versus worker count.
+
+Replicates the Telco dataset to --rows rows in a temporary CSV, then scores it
+with 1, 2, 4, ... worker processes (up to --max-workers) and prints rows/sec:
+
+    python benchmark_bulk.py --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from artifacts import load_artifacts
+from bulk_score import score_parallel
+from config import CHURN_THRESHOLD
+from dataset import DATASET_PATH
+from score_csv import BACKEND_DIR, read_chunks, score_chunk
+
+
+def write_replicated(path, rows):
+    """Repeat the raw Telco CSV until it has rows rows, giving each copy unique customerIDs"""
+    base = pd.read_csv(DATASET_PATH, dtype={'customerID': str})
+    written = 0
+    for copy in range(-(-rows // len(base))):
+        block = base.iloc[:rows - written].copy()
+        block['customerID'] = block['customerID'] + f'-{copy}'
+        block.to_csv(path, mode='a', header=copy == 0, index=False)
+        written += len(block)
+    return written
+
+
+def run(path, chunk_size, workers, args):
+    start = time.perf_counter()
+    if workers == 1:
+        artifacts = load_artifacts(args.bundle, args.model_dir)
+        results = (score_chunk(artifacts, chunk, CHURN_THRESHOLD) for chunk in read_chunks(path, chunk_size))
+    else:
+        results = score_parallel(read_chunks(path, chunk_size), CHURN_THRESHOLD, workers,
+                                 args.bundle, args.model_dir)
+    scored = sum(len(scores) for scores, _ in results)
+    return scored, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--bundle', default=None)
+    parser.add_argument('--model-dir', default=BACKEND_DIR)
+    args = parser.parse_args()
+
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= args.max_workers:
+        worker_counts.append(worker_counts[-1] * 2)
+    if worker_counts[-1] != args.max_workers:
+        worker_counts.append(args.max_workers)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'telco_replicated.csv')
+        rows = write_replicated(path, args.rows)
+        print(f"{rows} rows, chunk size {args.chunk_size}")
+
+        baseline = None
+        for workers in worker_counts:
+            scored, elapsed = run(path, args.chunk_size, workers, args)
+            throughput = scored / elapsed
+            baseline = baseline or throughput
+            print(f"workers {workers:>3}: {elapsed:8.2f}s  {throughput:12,.0f} rows/sec  "
+                  f"speedup {throughput / baseline:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
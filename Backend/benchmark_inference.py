@@ -0,0 +1,71 @@
+"""Per-request latency of the served path (encode + score_async) against the legacy predict + predict_proba path.
+
+Run from the Backend directory so the pickled artifacts are found:
+
+    python benchmark_inference.py --rows 500
+    USE_COMPILED_FOREST=1 python benchmark_inference.py --rows 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import backend
+from check_parity import legacy_prediction
+from dataset import feature_records, load_telco
+
+
+def served_prediction(loop, record):
+    """What /predict computes for one record, on the inference executor like the endpoint"""
+    current = backend.artifacts
+    row = current.feature_encoder.encode(record)[None, :]
+    return backend.label_results(loop.run_until_complete(backend.score_async(row, current)))[0]
+
+
+def time_calls(fn, records):
+    latencies = []
+    for record in records:
+        start = time.perf_counter()
+        fn(record)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarize(name, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"{name:<10} mean {statistics.mean(latencies):7.3f} ms   "
+          f"p50 {statistics.median(latencies):7.3f} ms   p95 {p95:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500, help="number of dataset rows to score")
+    parser.add_argument("--warmup", type=int, default=20)
+    args = parser.parse_args()
+
+    # Time the model itself rather than prediction cache hits
+    backend.prediction_cache = None
+    records = feature_records(load_telco().sample(n=args.rows, random_state=42))
+    loop = asyncio.new_event_loop()
+
+    def served(record):
+        return served_prediction(loop, record)
+
+    for fn in (legacy_prediction, served):
+        time_calls(fn, records[:args.warmup])
+
+    before = time_calls(legacy_prediction, records)
+    after = time_calls(served, records)
+    mismatches = sum(legacy_prediction(r)[0] != served(r)[0] for r in records)
+    loop.close()
+
+    print(f"{len(records)} requests, threshold {backend.CHURN_THRESHOLD}")
+    summarize("before", before)
+    summarize("after", after)
+    print(f"speedup    {statistics.mean(before) / statistics.mean(after):.2f}x, "
+          f"label mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Process-pool scoring for inputs too large for one core.
+
+Each worker loads the model artifacts once, in the pool initializer, and then
+scores whole chunks; results are yielded in input order.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from artifacts import init_worker, worker_artifacts
+from score_csv import score_chunk
+
+
+def _score_task(chunk, threshold):
+    return score_chunk(worker_artifacts(), chunk, threshold)
+
+
+def score_parallel(chunks, threshold, workers, bundle_dir=None, model_dir='.', compile_forest=False,
+                   max_pending=None):
+    """Yield score_chunk results for chunks, in order, using a pool of worker processes.
+
+    At most max_pending chunks (default: two per worker) are in flight, so memory
+    stays bounded when the input is read lazily.
+    """
+    max_pending = max_pending or 2 * workers
+    with ProcessPoolExecutor(workers, initializer=init_worker,
+                             initargs=(bundle_dir, model_dir, compile_forest)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_score_task, chunk, threshold))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
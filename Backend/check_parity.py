@@ -0,0 +1,153 @@
+"""Checks that the optimised inference path reproduces the original pandas/sklearn one.
+
+Run from the Backend directory so the pickled artifacts are found:
+
+    python check_parity.py forest bundle explain
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import backend
+from dataset import feature_records, load_telco
+from forest_engine import CompiledForest
+from model_bundle import export_bundle, load_bundle
+
+
+def legacy_preprocess(input_df):
+    """The original per-request encoding: every LabelEncoder, then the scaler via pandas"""
+    for col, encoder in backend.artifacts.encoders.items():
+        input_df[col] = encoder.transform(input_df[col])
+
+    numerical_cols = ['tenure', 'MonthlyCharges', 'TotalCharges']
+    input_df[numerical_cols] = backend.artifacts.scaler.transform(input_df[numerical_cols])
+    return input_df
+
+
+def served_predictions(rows):
+    """(label, probability) per encoded row from the endpoints' score_async path"""
+    return backend.label_results(asyncio.run(backend.score_async(rows, backend.artifacts)))
+
+
+def legacy_prediction(input_data):
+    input_df = legacy_preprocess(pd.DataFrame([input_data]))
+
+    prediction = backend.artifacts.model.predict(input_df)[0]
+    probability = backend.artifacts.model.predict_proba(input_df)[0, 1]
+    return "Churn" if prediction == 1 else "No Churn", probability
+
+
+def check_encoder(records):
+    """FeatureEncoder rows and the resulting predictions must match the legacy path exactly"""
+    legacy_rows = np.vstack([legacy_preprocess(pd.DataFrame([record])).to_numpy(dtype=np.float64)
+                             for record in records])
+    encoded_rows = backend.artifacts.feature_encoder.encode_many(records)
+    mismatched_rows = np.flatnonzero(~(legacy_rows == encoded_rows).all(axis=1))
+
+    legacy_df = pd.DataFrame(legacy_rows, columns=backend.artifacts.feature_encoder.columns)
+    legacy_probabilities = backend.artifacts.model.predict_proba(legacy_df)[:, 1]
+    legacy_labels = backend.artifacts.model.predict(legacy_df)
+    predictions = served_predictions(encoded_rows)
+    mismatched_predictions = [
+        row for row, (label, probability) in enumerate(predictions)
+        if probability != legacy_probabilities[row]
+        or label != ("Churn" if legacy_labels[row] == 1 else "No Churn")
+    ]
+
+    print(f"encoder: {len(records)} rows, {len(mismatched_rows)} encoding mismatches, "
+          f"{len(mismatched_predictions)} prediction mismatches")
+    return len(mismatched_rows) == 0 and not mismatched_predictions
+
+
+def check_forest(records, tolerance=1e-9):
+    """CompiledForest probabilities must agree with predict_proba, batched and row by row"""
+    forest = CompiledForest.from_sklearn(backend.artifacts.model)
+    rows = backend.artifacts.feature_encoder.encode_many(records)
+    expected = backend.artifacts.model.predict_proba(
+        pd.DataFrame(rows, columns=backend.artifacts.feature_encoder.columns))[:, 1]
+
+    batch_error = np.abs(forest.predict_proba(rows) - expected).max()
+    single_rows = range(0, len(rows), max(1, len(rows) // 200))
+    single_error = max(abs(forest.predict_proba(rows[row:row + 1])[0] - expected[row]) for row in single_rows)
+
+    print(f"forest: {forest.n_trees} trees, {forest.n_nodes} nodes, depth {forest.max_depth}; "
+          f"max |diff| batch {batch_error:.3g}, single-row {single_error:.3g} (tolerance {tolerance:g})")
+    return batch_error <= tolerance and single_error <= tolerance
+
+
+def check_bundle(records):
+    """A freshly exported, memory-mapped bundle must score exactly like the in-memory forest"""
+    forest = CompiledForest.from_sklearn(backend.artifacts.model)
+    expected = forest.predict_proba(backend.artifacts.feature_encoder.encode_many(records))
+    with tempfile.TemporaryDirectory() as out_dir:
+        bundle_dir = export_bundle(forest, backend.artifacts.feature_encoder, out_dir, 'parity', backend.artifacts.model_hash)
+        bundle_forest, bundle_encoder, _ = load_bundle(bundle_dir)
+        probabilities = bundle_forest.predict_proba(bundle_encoder.encode_many(records))
+        mismatches = int((probabilities != expected).sum())
+        del bundle_forest
+
+    print(f"bundle: {len(records)} rows, {mismatches} probability mismatches")
+    return mismatches == 0
+
+
+def check_explain(records, tolerance=1e-9):
+    """Explanation contributions plus bias must add up to the forest's probability for every row"""
+    forest = CompiledForest.from_sklearn(backend.artifacts.model)
+    rows = backend.artifacts.feature_encoder.encode_many(records)
+    bias, contributions = forest.explain(rows)
+    error = np.abs(bias + contributions.sum(axis=1) - forest.predict_proba(rows)).max()
+
+    print(f"explain: {len(records)} rows, max |bias + sum(contributions) - probability| {error:.3g}")
+    return error <= tolerance
+
+
+def check_non_finite(records):
+    """NaN, inf and values beyond float32 must be rejected by the encoder: the compiled forest
+    sends NaN right at every split, where sklearn follows each node's missing-value branch,
+    and sklearn refuses anything that is not finite as float32"""
+    encoder = backend.artifacts.feature_encoder
+    bad_records = [{**records[0], col: value} for col in encoder.numerical_cols
+                   for value in (float('nan'), float('inf'), float('-inf'), 1e300, -1e300)]
+    accepted = []
+    for record in bad_records:
+        try:
+            encoder.encode(record)
+            accepted.append(record)
+        except ValueError:
+            pass
+    _, errors = encoder.encode_frame(pd.DataFrame(bad_records))
+
+    print(f"non-finite: {len(bad_records)} rows, {len(accepted)} accepted by encode, "
+          f"{len(bad_records) - len(errors)} accepted by encode_frame")
+    return not accepted and len(errors) == len(bad_records)
+
+
+CHECKS = {
+    'encoder': check_encoder,
+    'forest': check_forest,
+    'bundle': check_bundle,
+    'explain': check_explain,
+    'non_finite': check_non_finite,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('checks', nargs='*', metavar='check',
+                        help=f"one or more of {', '.join(CHECKS)} (default: all)")
+    args = parser.parse_args()
+    unknown = set(args.checks) - set(CHECKS)
+    if unknown:
+        parser.error(f"unknown check(s): {', '.join(sorted(unknown))}")
+
+    records = feature_records(load_telco())
+    results = [CHECKS[name](records) for name in args.checks or CHECKS]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""Compresses the Random Forest into smaller variants and reports latency and size against accuracy.
+
+The grid search picks 200 trees of unbounded depth (over 600k nodes), far more than
+the test accuracy needs. Each variant below is a CompiledForest:
+- trees-K: the K trees whose average best matches the full forest's probabilities
+  on the training split, picked greedily, so redundant trees are the ones left out
+- depth-D: every tree cut at depth D; the nodes at depth D become leaves
+- trees-K-depth-D: both
+- rf-NxD: N regression trees of depth D distilled from the full forest's probabilities
+- gb-NxD: N gradient-boosted trees of depth D distilled from its log-odds, with a
+  sigmoid link
+
+Every variant is scored on train.py's test split, the Telco holdout. The report covers:
+- ROC AUC and accuracy
+- agreement with the full forest's labels
+- single-row and 1000-row latency
+- bundle size and peak scoring memory
+A variant is on the Pareto front (marked *) when no other variant is at least as
+good on ROC AUC, single-row latency and size at once.
+
+Variants are model bundles, so the backend serves them like any other model:
+
+    python compress.py --report compression.json
+    python compress.py --export trees-50-depth-10 gb-200x4 --out bundles   # then MODEL_BUNDLE=bundles/<version>
+    python compress.py --publish gb-200x4 --registry registry --activate
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+import tracemalloc
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.metrics import accuracy_score, roc_auc_score
+
+from artifacts import load_pickles
+from config import CHURN_THRESHOLD
+from dataset import DATASET_PATH
+from forest_engine import CompiledForest
+from model_bundle import export_bundle
+from model_registry import ModelRegistry
+from refresh import RANDOM_STATE, history_split
+
+# Distillation targets are clipped away from 0 and 1 before taking log-odds
+LOGIT_EPSILON = 1e-3
+
+
+def trees_by_depth(spec):
+    """'50x8' -> (50 trees, depth 8)"""
+    trees, depth = spec.lower().split('x')
+    return int(trees), int(depth)
+
+
+def forest_hash(forest):
+    """SHA-256 of a forest's arrays and output, the model hash of its bundle"""
+    digest = hashlib.sha256(json.dumps(forest.output(), sort_keys=True).encode())
+    for array in forest.arrays().values():
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def select_trees(forest, rows, count):
+    """Indices of count trees, picked greedily so their average tracks the whole forest on rows"""
+    leaf_values = forest.value[forest.leaves(rows)]
+    target = leaf_values.mean(axis=1)
+    chosen, total = [], np.zeros(len(rows))
+    for size in range(1, count + 1):
+        errors = np.square((total[:, None] + leaf_values) / size - target[:, None]).mean(axis=0)
+        errors[chosen] = np.inf
+        best = int(np.argmin(errors))
+        chosen.append(best)
+        total += leaf_values[:, best]
+    return chosen
+
+
+def distill_forest(rows, probabilities, trees, depth, jobs=None):
+    model = RandomForestRegressor(trees, max_depth=depth, n_jobs=jobs, random_state=RANDOM_STATE)
+    return CompiledForest.from_sklearn_regressor(model.fit(rows, probabilities))
+
+
+def distill_boosting(rows, probabilities, trees, depth):
+    clipped = np.clip(probabilities, LOGIT_EPSILON, 1 - LOGIT_EPSILON)
+    model = GradientBoostingRegressor(n_estimators=trees, max_depth=depth, random_state=RANDOM_STATE)
+    return CompiledForest.from_sklearn_regressor(model.fit(rows, np.log(clipped / (1 - clipped))), link='sigmoid')
+
+
+def build_variants(teacher, rows, args):
+    """Every variant asked for, by name, built from the full forest and the training rows"""
+    variants = {"full": teacher}
+    tree_counts = sorted(count for count in args.tree_counts if count < teacher.n_trees)
+    order = select_trees(teacher, rows, max(tree_counts)) if tree_counts else []
+    pruned = {f"trees-{count}": teacher.select(order[:count]) for count in tree_counts}
+    variants.update(pruned)
+    for depth in sorted(args.depths):
+        if depth < teacher.max_depth:
+            variants[f"depth-{depth}"] = teacher.truncate(depth)
+            for name, forest in pruned.items():
+                variants[f"{name}-depth-{depth}"] = forest.truncate(depth)
+
+    probabilities = teacher.predict_proba(rows)
+    for trees, depth in args.distill_forests:
+        variants[f"rf-{trees}x{depth}"] = distill_forest(rows, probabilities, trees, depth, args.jobs)
+    for trees, depth in args.distill_boosting:
+        variants[f"gb-{trees}x{depth}"] = distill_boosting(rows, probabilities, trees, depth)
+    return variants
+
+
+def measure(forest, rows, labels, teacher_probabilities, single_rows=200, batch_rows=1000):
+    """Accuracy, agreement with the full forest, latency, size and scoring memory of one variant"""
+    probabilities = forest.predict_proba(rows)
+
+    single = []
+    for row in rows[:single_rows]:
+        started = time.perf_counter()
+        forest.predict_proba(row[None, :])
+        single.append(time.perf_counter() - started)
+    batch = rows[:batch_rows]
+    batch_seconds = []
+    for _ in range(3):
+        started = time.perf_counter()
+        forest.predict_proba(batch)
+        batch_seconds.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    forest.predict_proba(batch)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "roc_auc": float(roc_auc_score(labels, probabilities)),
+        "accuracy": float(accuracy_score(labels, probabilities > CHURN_THRESHOLD)),
+        "label_agreement": float(np.mean((probabilities > CHURN_THRESHOLD)
+                                         == (teacher_probabilities > CHURN_THRESHOLD))),
+        "single_row_p50_us": float(np.median(single) * 1e6),
+        f"batch_{len(batch)}_ms": float(min(batch_seconds) * 1000),
+        "size_kb": sum(array.nbytes for array in forest.arrays().values()) / 1024,
+        f"peak_memory_{len(batch)}_rows_kb": peak / 1024,
+        "n_trees": forest.n_trees,
+        "n_nodes": forest.n_nodes,
+        "max_depth": forest.max_depth,
+        **forest.output(),
+    }
+
+
+def mark_pareto(results):
+    """Flag the variants no other variant matches or beats on ROC AUC, single-row latency and size"""
+    keys = (("roc_auc", 1), ("single_row_p50_us", -1), ("size_kb", -1))
+    for result in results.values():
+        scores = [sign * result[key] for key, sign in keys]
+        result["pareto"] = not any(
+            all(sign * other[key] >= score for (key, sign), score in zip(keys, scores))
+            and any(sign * other[key] > score for (key, sign), score in zip(keys, scores))
+            for other in results.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model-dir', default='.', help="directory of the forest, with its encoder.pkl and scaler.pkl")
+    parser.add_argument('--model', default='best_model.pkl')
+    parser.add_argument('--data', default=DATASET_PATH, help="Telco data, split into train and holdout as train.py does")
+    parser.add_argument('--tree-counts', type=int, nargs='*', default=[10, 25, 50, 100])
+    parser.add_argument('--depths', type=int, nargs='*', default=[6, 8, 10, 12])
+    parser.add_argument('--distill-forests', type=trees_by_depth, nargs='*', default=[(25, 8), (50, 10)],
+                        metavar='NxD')
+    parser.add_argument('--distill-boosting', type=trees_by_depth, nargs='*', default=[(100, 3), (200, 4)],
+                        metavar='NxD')
+    parser.add_argument('--jobs', type=int, default=-1, help="parallel tree fits when distilling (-1: all cores)")
+    parser.add_argument('--report', help="write every variant's measurements to this JSON file")
+    parser.add_argument('--export', nargs='+', default=[], metavar='VARIANT', help="write these variants as bundles")
+    parser.add_argument('--out', default='bundles', help="directory --export writes bundles under")
+    parser.add_argument('--publish', metavar='VARIANT', help="add this variant to the model registry")
+    parser.add_argument('--registry', default=os.environ.get('MODEL_REGISTRY', 'registry'))
+    parser.add_argument('--version', help="registry version for --publish (default: first 12 hex digits of its hash)")
+    parser.add_argument('--activate', action='store_true',
+                        help="make the published variant the one the backend serves")
+    args = parser.parse_args()
+
+    base = load_pickles(args.model_dir, model_name=args.model)
+    fit_rows, holdout_rows, _, holdout_labels = history_split(base.feature_encoder, args.data)
+    teacher = CompiledForest.from_sklearn(base.model)
+    model_size_kb = os.path.getsize(os.path.join(args.model_dir, args.model)) / 1024
+
+    started = time.perf_counter()
+    variants = build_variants(teacher, fit_rows, args)
+    print(f"built {len(variants)} variants in {time.perf_counter() - started:.1f}s "
+          f"({args.model}: {model_size_kb:,.0f} KB pickled)")
+    unknown = [name for name in [*args.export, *filter(None, [args.publish])] if name not in variants]
+    if unknown:
+        raise SystemExit(f"unknown variants {', '.join(unknown)}; built: {', '.join(variants)}")
+
+    teacher_probabilities = teacher.predict_proba(holdout_rows)
+    results = {name: measure(forest, holdout_rows, holdout_labels, teacher_probabilities)
+               for name, forest in variants.items()}
+    mark_pareto(results)
+
+    print(f"{'':2}{'variant':<22}{'ROC AUC':>8}{'acc':>7}{'agree':>7}{'1 row us':>10}{'1k rows ms':>11}"
+          f"{'size KB':>10}{'trees':>7}{'nodes':>9}{'depth':>6}")
+    for name, result in sorted(results.items(), key=lambda item: item[1]["size_kb"]):
+        print(f"{'*' if result['pareto'] else ' ':2}{name:<22}{result['roc_auc']:>8.4f}{result['accuracy']:>7.3f}"
+              f"{result['label_agreement']:>7.3f}{result['single_row_p50_us']:>10.0f}"
+              f"{result['batch_1000_ms']:>11.1f}{result['size_kb']:>10,.0f}{result['n_trees']:>7}"
+              f"{result['n_nodes']:>9,}{result['max_depth']:>6}")
+
+    if args.report:
+        with open(args.report, 'w') as report_file:
+            json.dump({"model": os.path.abspath(os.path.join(args.model_dir, args.model)),
+                       "model_hash": base.model_hash, "model_size_kb": model_size_kb,
+                       "holdout_rows": len(holdout_rows), "variants": results}, report_file, indent=2)
+        print(f"wrote {args.report}")
+
+    def provenance(name):
+        return {"compression": {"variant": name, "teacher_model_hash": base.model_hash, **results[name]}}
+
+    for name in args.export:
+        model_hash = forest_hash(variants[name])
+        bundle_dir = export_bundle(variants[name], base.feature_encoder, args.out, model_hash[:12], model_hash,
+                                   extra=provenance(name))
+        print(f"wrote {name} to {bundle_dir}")
+    if args.publish:
+        model_hash = forest_hash(variants[args.publish])
+        version = ModelRegistry(args.registry).publish_forest(
+            variants[args.publish], base.feature_encoder, args.version or model_hash[:12], model_hash,
+            extra=provenance(args.publish), activate=args.activate)
+        print(f"published {args.publish} as {version} to {args.registry}" + (" (active)" if args.activate else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+
+from dataset import DATASET_PATH
+
+
+def env_flag(name, default=False):
+    return os.environ.get(name, "1" if default else "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+# Churn probability above which a customer is labelled "Churn". The default
+# matches RandomForestClassifier.predict, which breaks a 0.5 tie towards class 0.
+CHURN_THRESHOLD = float(os.environ.get("CHURN_THRESHOLD", "0.5"))
+
+# Serve probabilities from the flat array forest (forest_engine.py) instead of
+# RandomForestClassifier.predict_proba
+USE_COMPILED_FOREST = env_flag("USE_COMPILED_FOREST")
+
+# In-process LRU cache of probabilities keyed on the encoded row. A size of 0
+# disables it; a TTL of 0 keeps entries until they are evicted.
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", "0"))
+
+# Directory of a bundle written by model_bundle.py. When set the backend serves
+# its memory-mapped arrays instead of unpickling best_model.pkl and friends.
+MODEL_BUNDLE = os.environ.get("MODEL_BUNDLE") or None
+
+# Where the forest runs for API requests: 'thread' or 'process' pools keep it off
+# the asyncio event loop, 'inline' scores on the loop. Requests beyond
+# INFERENCE_QUEUE_SIZE pending jobs are shed with a 503.
+INFERENCE_EXECUTOR = os.environ.get("INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+INFERENCE_QUEUE_SIZE = int(os.environ.get("INFERENCE_QUEUE_SIZE", "64"))
+
+# Coalesce concurrent /predict calls into one forest pass: a batch closes after
+# MICRO_BATCH_MAX_SIZE rows or MICRO_BATCH_MAX_WAIT_MS milliseconds.
+MICRO_BATCH_ENABLED = env_flag("MICRO_BATCH_ENABLED")
+MICRO_BATCH_MAX_SIZE = int(os.environ.get("MICRO_BATCH_MAX_SIZE", "64"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.environ.get("MICRO_BATCH_MAX_WAIT_MS", "2"))
+
+# Serve per-feature explanations on /explain. Needs the compiled forest, which is
+# built at startup from the pickle when USE_COMPILED_FOREST is off.
+EXPLANATIONS_ENABLED = env_flag("EXPLANATIONS_ENABLED", default=True)
+
+# Directory of a model registry (model_registry.py). When set the backend serves the
+# version named in its ACTIVE file and takes precedence over MODEL_BUNDLE. Every
+# MODEL_RELOAD_INTERVAL seconds (0 disables the watch) ACTIVE is checked and a new
+# version is loaded, warmed up and swapped in without a restart.
+MODEL_REGISTRY = os.environ.get("MODEL_REGISTRY") or None
+MODEL_RELOAD_INTERVAL = float(os.environ.get("MODEL_RELOAD_INTERVAL", "10"))
+
+# Shared secret for the /admin endpoints, sent as an X-Admin-Token header. The
+# endpoints are disabled when it is unset.
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN") or None
+
+# A second model compared against the served one: a bundle directory, or a pickled
+# classifier trained on the same encoding (e.g. the notebook's XGBClassifier) next
+# to encoder.pkl and scaler.pkl. SECONDARY_MODE 'shadow' scores a
+# SHADOW_SAMPLE_RATE fraction of requests with it after the response has been sent
+# and appends both predictions to SHADOW_LOG; 'ab' serves an AB_WEIGHT fraction of
+# requests with it instead of the primary model.
+SECONDARY_MODEL = os.environ.get("SECONDARY_MODEL") or None
+SECONDARY_MODE = os.environ.get("SECONDARY_MODE", "shadow")
+SHADOW_SAMPLE_RATE = float(os.environ.get("SHADOW_SAMPLE_RATE", "0.1"))
+SHADOW_LOG = os.environ.get("SHADOW_LOG", "shadow_log.jsonl")
+AB_WEIGHT = float(os.environ.get("AB_WEIGHT", "0.1"))
+
+# Reference data for the input-drift monitor served on /drift (empty disables it),
+# and how many recent rows the live distributions cover (between one and two windows)
+DRIFT_REFERENCE = os.environ.get("DRIFT_REFERENCE", DATASET_PATH)
+DRIFT_WINDOW = int(os.environ.get("DRIFT_WINDOW", "10000"))
+
+# Audit log of every scored record (audit_log.py), one SQLite file per day in
+# AUDIT_LOG_DIR (empty disables it). Up to AUDIT_QUEUE_SIZE requests wait for the
+# background writer; beyond that they are dropped and counted, never waited on.
+AUDIT_LOG_DIR = os.environ.get("AUDIT_LOG_DIR", "audit")
+AUDIT_QUEUE_SIZE = int(os.environ.get("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get("AUDIT_FLUSH_INTERVAL", "1.0"))
+
+# Largest grid /whatif scores in one request (the product of the swept fields' sizes)
+WHATIF_MAX_ROWS = int(os.environ.get("WHATIF_MAX_ROWS", "50000"))
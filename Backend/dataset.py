@@ -0,0 +1,27 @@
+import os
+import pandas as pd
+
+DATASET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Datasets',
+                            'WA_Fn-UseC_-Telco-Customer-Churn.csv')
+
+FEATURE_COLUMNS = ['gender', 'SeniorCitizen', 'Partner', 'Dependents', 'tenure', 'PhoneService',
+                   'MultipleLines', 'InternetService', 'OnlineSecurity', 'OnlineBackup',
+                   'DeviceProtection', 'TechSupport', 'StreamingTV', 'StreamingMovies', 'Contract',
+                   'PaperlessBilling', 'PaymentMethod', 'MonthlyCharges', 'TotalCharges']
+
+def fix_total_charges(df, strict=True):
+    """Blank TotalCharges (brand new customers) become 0.0, as in the notebook.
+
+    With strict=False any other unparseable value is left in place for the
+    encoder to reject row by row instead of failing the whole frame.
+    """
+    total_charges = df['TotalCharges'].replace({" ": "0.0"})
+    df['TotalCharges'] = total_charges.astype(float) if strict else total_charges
+    return df
+
+def load_telco(path=DATASET_PATH):
+    return fix_total_charges(pd.read_csv(path))
+
+def feature_records(df):
+    """Rows of df as PredictionRequest-shaped dicts"""
+    return df[FEATURE_COLUMNS].to_dict('records')
@@ -0,0 +1,118 @@
+"""Input-drift monitor: live request features against the Telco training data.
+
+Every field is tracked on the rows the backend has already encoded:
+- label-encoded fields count their codes, one bin per vocabulary entry
+- other fields (tenure, MonthlyCharges, TotalCharges, SeniorCitizen) use a fixed
+  histogram cut at the reference data's quantiles, so each bin holds a similar
+  share of the training data
+
+Updating is a few numpy operations on fixed-size count arrays, whatever the
+traffic volume. Live counts cover the most recent ``window`` to ``2 * window`` rows:
+two tumbling windows, the filling one and the last complete one.
+
+The report compares the live and reference histograms per field:
+- PSI (population stability index)
+- for ordered fields, KS: the largest gap between the two CDFs at the bin edges
+"""
+import numpy as np
+import pandas as pd
+
+from dataset import fix_total_charges
+
+# PSI rules of thumb: below 0.1 stable, 0.1 to 0.25 moderate shift, above 0.25 significant
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+# Floor for empty bins, so PSI stays finite
+PSI_EPSILON = 1e-4
+
+
+class DriftMonitor:
+    def __init__(self, feature_encoder, reference_rows, window=10000, numeric_bins=20):
+        self.feature_encoder = feature_encoder
+        self.window = window
+        self.columns = feature_encoder.columns
+
+        self._categorical = np.array([position for position, col in enumerate(self.columns)
+                                      if col in feature_encoder.vocabularies], dtype=np.intp)
+        self._cuts = {}
+        sizes = []
+        for position, col in enumerate(self.columns):
+            if col in feature_encoder.vocabularies:
+                sizes.append(len(feature_encoder.vocabularies[col]))
+            else:
+                quantiles = np.quantile(reference_rows[:, position], np.linspace(0, 1, numeric_bins + 1)[1:-1])
+                self._cuts[position] = np.unique(quantiles)
+                sizes.append(len(self._cuts[position]) + 1)
+        self._offsets = np.concatenate([[0], np.cumsum(sizes)])
+
+        self.reference = np.bincount(self._bins(reference_rows).ravel(), minlength=self._offsets[-1])
+        self.reference_rows = len(reference_rows)
+        self._current = np.zeros(self._offsets[-1], dtype=np.int64)
+        self._previous = np.zeros_like(self._current)
+        self._current_rows = 0
+        self._previous_rows = 0
+        self.rows_seen = 0
+
+    @classmethod
+    def from_csv(cls, feature_encoder, path, window=10000):
+        """Reference profile from a Telco-format CSV; rows the encoder rejects are skipped"""
+        reference = fix_total_charges(pd.read_csv(path), strict=False)
+        rows, errors = feature_encoder.encode_frame(reference)
+        if errors:
+            rows = np.delete(rows, list(errors), axis=0)
+        return cls(feature_encoder, rows, window)
+
+    def _bins(self, rows):
+        """Global bin index of every field of every row"""
+        bins = np.empty(rows.shape, dtype=np.intp)
+        bins[:, self._categorical] = rows[:, self._categorical]
+        for position, cuts in self._cuts.items():
+            bins[:, position] = np.searchsorted(cuts, rows[:, position], side='right')
+        return bins + self._offsets[:-1]
+
+    def update(self, rows):
+        """Count encoded rows (an (n, features) array) into the live histograms"""
+        if self._current_rows >= self.window:
+            self._previous, self._current = self._current, self._previous
+            self._current[:] = 0
+            self._previous_rows, self._current_rows = self._current_rows, 0
+        bins = self._bins(rows)
+        if len(rows) == 1:
+            # Fields have disjoint bin ranges, so a single row's indices are unique
+            self._current[bins[0]] += 1
+        else:
+            self._current += np.bincount(bins.ravel(), minlength=len(self._current))
+        self._current_rows += len(rows)
+        self.rows_seen += len(rows)
+
+    def report(self, min_rows=100):
+        """PSI (and KS for ordered fields) of each field's live distribution against the reference"""
+        live = self._current + self._previous
+        live_rows = self._current_rows + self._previous_rows
+        body = {"live_rows": live_rows, "rows_seen": self.rows_seen, "reference_rows": self.reference_rows,
+                "window": self.window}
+        if live_rows < min_rows:
+            return {**body, "status": "insufficient_data", "min_rows": min_rows, "features": {}}
+
+        features = {}
+        for position, col in enumerate(self.columns):
+            bins = slice(self._offsets[position], self._offsets[position + 1])
+            expected = np.maximum(self.reference[bins] / self.reference_rows, PSI_EPSILON)
+            actual = np.maximum(live[bins] / live_rows, PSI_EPSILON)
+            psi = float(np.sum((actual - expected) * np.log(actual / expected)))
+            feature = {"psi": psi, "status": drift_status(psi)}
+            if position in self._cuts:
+                feature["ks"] = float(np.max(np.abs(np.cumsum(self.reference[bins]) / self.reference_rows
+                                                    - np.cumsum(live[bins]) / live_rows)))
+            features[col] = feature
+
+        drifted = [col for col, feature in features.items() if feature["status"] != "stable"]
+        worst = max(features.values(), key=lambda feature: feature["psi"])["status"]
+        return {**body, "status": worst, "drifted": drifted, "features": features}
+
+
+def drift_status(psi):
+    if psi >= PSI_SIGNIFICANT:
+        return "significant"
+    return "moderate" if psi >= PSI_MODERATE else "stable"
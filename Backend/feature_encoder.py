@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+from dataset import FEATURE_COLUMNS
+
+NUMERICAL_COLS = ['tenure', 'MonthlyCharges', 'TotalCharges']
+# Label-encoded fields, in the order of the notebook's encoder.pkl (SeniorCitizen is already 0/1)
+CATEGORICAL_COLS = ['gender', 'Partner', 'Dependents', 'PhoneService', 'MultipleLines', 'InternetService',
+                    'OnlineSecurity', 'OnlineBackup', 'DeviceProtection', 'TechSupport', 'StreamingTV',
+                    'StreamingMovies', 'Contract', 'PaperlessBilling', 'PaymentMethod']
+
+# sklearn and CompiledForest compare features as float32, so encoded values must fit in it
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+
+def value_problem(value):
+    """Why an encoded value the forest cannot score was rejected"""
+    return 'not a finite number' if not np.isfinite(value) else 'out of float32 range'
+
+
+def plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class FeatureEncoder:
+    """Turns PredictionRequest-shaped dicts into model-ready float64 rows.
+
+    Equivalent to running every LabelEncoder and the StandardScaler over a one-row
+    DataFrame, but done with dict lookups and precomputed mean/scale arrays.
+    """
+
+    def __init__(self, vocabularies, mean, scale, numerical_cols=NUMERICAL_COLS, columns=FEATURE_COLUMNS):
+        self.columns = list(columns)
+        self.vocabularies = {col: list(classes) for col, classes in vocabularies.items()}
+        self.numerical_cols = list(numerical_cols)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+
+        self._lookups = {col: {value: float(code) for code, value in enumerate(classes)}
+                         for col, classes in self.vocabularies.items()}
+        self._fields = [(position, col, self._lookups.get(col)) for position, col in enumerate(self.columns)]
+        self._numeric_positions = np.array([self.columns.index(col) for col in self.numerical_cols])
+
+    @classmethod
+    def from_artifacts(cls, encoders, scaler):
+        """Build from the pickled LabelEncoder dict and StandardScaler"""
+        numerical_cols = list(getattr(scaler, 'feature_names_in_', NUMERICAL_COLS))
+        vocabularies = {col: encoder.classes_.tolist() for col, encoder in encoders.items()}
+        return cls(vocabularies, scaler.mean_, scaler.scale_, numerical_cols)
+
+    def encode(self, record):
+        row = np.empty(len(self.columns), dtype=np.float64)
+        for position, col, lookup in self._fields:
+            value = record[col]
+            if lookup is None:
+                try:
+                    row[position] = value
+                except OverflowError:
+                    raise ValueError(f"{col}: out of float32 range {value!r}") from None
+            else:
+                try:
+                    row[position] = lookup[value]
+                except KeyError:
+                    raise ValueError(f"{col}: unknown category {value!r}") from None
+
+        numeric = self._numeric_positions
+        row[numeric] = (row[numeric] - self.mean) / self.scale
+        # NaN, inf and values past float32 would take an arbitrary branch at every split
+        # (and sklearn rejects them); the comparison is False for NaN
+        rejected = ~(np.abs(row) <= FLOAT32_MAX)
+        if rejected.any():
+            position = int(np.flatnonzero(rejected)[0])
+            col = self.columns[position]
+            raise ValueError(f"{col}: {value_problem(row[position])} {record[col]!r}")
+        return row
+
+    def encode_values(self, col, values):
+        """Encoded values of one field, e.g. to fill that column across many rows"""
+        lookup = self._lookups.get(col)
+        if lookup is not None:
+            try:
+                return np.array([lookup[value] for value in values], dtype=np.float64)
+            except KeyError as exc:
+                raise ValueError(f"{col}: unknown category {exc.args[0]!r}") from None
+
+        raw = np.asarray(values, dtype=np.float64)
+        column = raw
+        if col in self.numerical_cols:
+            scaled = self.numerical_cols.index(col)
+            column = (column - self.mean[scaled]) / self.scale[scaled]
+        rejected = ~(np.abs(column) <= FLOAT32_MAX)
+        if rejected.any():
+            position = int(np.flatnonzero(rejected)[0])
+            raise ValueError(f"{col}: {value_problem(column[position])} {plain(raw[position])!r}")
+        return column
+
+    def encode_many(self, records):
+        if not records:
+            return np.empty((0, len(self.columns)), dtype=np.float64)
+        return np.vstack([self.encode(record) for record in records])
+
+    def encode_records(self, records):
+        """encode_frame of a list of record dicts"""
+        return self.encode_frame(pd.DataFrame.from_records(records, columns=self.columns))
+
+    def encode_frame(self, df):
+        """Vectorised encode of a DataFrame of raw records.
+
+        Returns the encoded rows and a {row position: message} dict for rows with an
+        unknown category or a non-numeric, NaN, infinite or out of float32 range value;
+        those rows are not usable in the output.
+        """
+        rows = np.empty((len(df), len(self.columns)), dtype=np.float64)
+        for position, col, lookup in self._fields:
+            values = df[col]
+            if lookup is None:
+                try:
+                    rows[:, position] = values.to_numpy(dtype=np.float64)
+                except (TypeError, ValueError, OverflowError):
+                    rows[:, position] = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+            else:
+                rows[:, position] = values.map(lookup).to_numpy(dtype=np.float64)
+
+        numeric = self._numeric_positions
+        rows[:, numeric] = (rows[:, numeric] - self.mean) / self.scale
+
+        errors = {}
+        for row, position in zip(*np.nonzero(~(np.abs(rows) <= FLOAT32_MAX))):
+            col = self.columns[position]
+            problem = 'unknown category' if col in self._lookups else value_problem(rows[row, position])
+            message = f"{col}: {problem} {plain(df[col].iloc[row])!r}"
+            errors[int(row)] = f"{errors[row]}; {message}" if row in errors else message
+        return rows, errors
@@ -0,0 +1,238 @@
+import numpy as np
+
+
+ARRAY_NAMES = ('feature', 'threshold', 'left', 'right', 'value', 'roots')
+
+# How the trees' leaf values become a probability: 'mean' averages them (random
+# forests); 'sum' adds them to base_score (gradient boosting, with the learning rate
+# folded into the values). The 'sigmoid' link maps the result from log-odds.
+AGGREGATIONS = ('mean', 'sum')
+LINKS = ('identity', 'sigmoid')
+
+
+class CompiledForest:
+    """A fitted RandomForestClassifier flattened into contiguous node arrays.
+
+    All trees share one set of arrays: ``feature``/``threshold`` describe the split at
+    each node, ``left``/``right`` hold global child indices and ``value`` the churn
+    probability of every node. Leaves point at themselves with a split that always
+    goes left, so a batch is evaluated by stepping all (row, tree) cursors together
+    ``max_depth`` times without any per-node branching.
+
+    Trees are stored one after another, each starting at its entry in ``roots``.
+    A random forest averages the trees' values; distilled models can instead sum them
+    onto ``base_score`` and apply a sigmoid link (see AGGREGATIONS and LINKS).
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, aggregation='mean',
+                 base_score=0.0, link='identity'):
+        if aggregation not in AGGREGATIONS or link not in LINKS:
+            raise ValueError(f"unsupported aggregation {aggregation!r} or link {link!r}")
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.aggregation = aggregation
+        self.base_score = float(base_score)
+        self.link = link
+        self._path_deltas = None
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def arrays(self):
+        return {name: getattr(self, name) for name in ARRAY_NAMES}
+
+    def output(self):
+        """How leaf values are combined, as stored in a bundle manifest"""
+        return {"aggregation": self.aggregation, "base_score": self.base_score, "link": self.link}
+
+    @classmethod
+    def from_sklearn(cls, model, positive_class=1):
+        """Export the trees of a fitted forest, keeping the probability of positive_class"""
+        class_index = list(model.classes_).index(positive_class)
+
+        def node_values(tree):
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            counts = tree.value[:, 0, :]
+            totals = counts.sum(axis=1)
+            totals[totals == 0.0] = 1.0
+            return counts[:, class_index] / totals
+
+        return cls._from_trees([estimator.tree_ for estimator in model.estimators_], node_values)
+
+    @classmethod
+    def from_sklearn_regressor(cls, model, link='identity'):
+        """Export a fitted RandomForestRegressor (averaged) or GradientBoostingRegressor (summed).
+
+        Use link='sigmoid' for a model fitted on log-odds.
+        """
+        estimators = np.asarray(model.estimators_)
+        if estimators.ndim == 1:
+            return cls._from_trees([estimator.tree_ for estimator in estimators],
+                                   lambda tree: tree.value[:, 0, 0], link=link)
+
+        # Gradient boosting: one regression tree per stage, scaled by the learning rate
+        init = getattr(model.init_, 'constant_', 0.0)
+        return cls._from_trees([estimator.tree_ for estimator in estimators[:, 0]],
+                               lambda tree: tree.value[:, 0, 0] * model.learning_rate, aggregation='sum',
+                               base_score=float(np.ravel(init)[0]), link=link)
+
+    @classmethod
+    def _from_trees(cls, trees, node_values, **output):
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset, max_depth = 0, 0
+        for tree in trees:
+            node_ids = np.arange(tree.node_count) + offset
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            values.append(node_values(tree))
+
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int64),
+            max_depth=max_depth,
+            **output,
+        )
+
+    def node_depths(self):
+        """Depth of every node below its tree's root"""
+        depths = np.zeros(self.n_nodes, dtype=np.int32)
+        frontier, depth = self.roots, 0
+        while len(frontier):
+            depths[frontier] = depth
+            internal = frontier[self.left[frontier] != frontier]
+            frontier = np.concatenate([self.left[internal], self.right[internal]])
+            depth += 1
+        return depths
+
+    def select(self, trees):
+        """A forest of only the given trees (indices into roots), with compacted arrays"""
+        trees = np.unique(trees)
+        ends = np.append(self.roots[1:], self.n_nodes)
+        keep = np.zeros(self.n_nodes, dtype=bool)
+        for tree in trees:
+            keep[self.roots[tree]:ends[tree]] = True
+        return self._compact(keep, self.feature, self.threshold, self.left, self.right, self.roots[trees])
+
+    def truncate(self, max_depth):
+        """Every tree cut at max_depth: nodes at that depth become leaves holding their own value"""
+        depths = self.node_depths()
+        cut = depths == max_depth
+        node_ids = np.arange(self.n_nodes, dtype=self.left.dtype)
+        return self._compact(depths <= max_depth, np.where(cut, 0, self.feature),
+                             np.where(cut, np.inf, self.threshold), np.where(cut, node_ids, self.left),
+                             np.where(cut, node_ids, self.right), self.roots)
+
+    def _compact(self, keep, feature, threshold, left, right, roots):
+        """Forest of the kept nodes, renumbered; kept nodes may only point at kept nodes"""
+        new_index = (np.cumsum(keep) - 1).astype(self.left.dtype)
+        forest = CompiledForest(feature=feature[keep], threshold=threshold[keep], left=new_index[left[keep]],
+                                right=new_index[right[keep]], value=self.value[keep],
+                                roots=new_index[roots].astype(np.int64), max_depth=0, **self.output())
+        forest.max_depth = int(forest.node_depths().max())
+        return forest
+
+    def leaves(self, rows):
+        """Leaf index reached in every tree, shape (n_rows, n_trees)"""
+        # sklearn's trees compare float32 features against float64 thresholds
+        X = np.asarray(rows, dtype=np.float32)
+        row_index = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            go_left = X[row_index, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, rows, block_size=4096):
+        """Churn probability per row, averaged over trees like RandomForestClassifier.
+
+        Rows are walked block_size at a time so the (rows, trees) cursor matrix stays
+        small for large inputs.
+        """
+        rows = np.asarray(rows)
+        if len(rows) <= block_size:
+            return self._probability(self._margin(self.value[self.leaves(rows)].sum(axis=1)))
+        return np.concatenate([self.predict_proba(rows[start:start + block_size], block_size)
+                               for start in range(0, len(rows), block_size)])
+
+    def _margin(self, total):
+        """Combined leaf values before the link"""
+        if self.aggregation == 'mean':
+            return total / self.n_trees
+        return self.base_score + total
+
+    def _probability(self, margin):
+        if self.link == 'sigmoid':
+            return 1.0 / (1.0 + np.exp(-margin))
+        return margin
+
+    def path_deltas(self):
+        """Change in churn probability from each node to its left and right child.
+
+        Computed once and cached; leaves have zero deltas because they loop to themselves.
+        """
+        if self._path_deltas is None:
+            self._path_deltas = (self.value[self.left] - self.value, self.value[self.right] - self.value)
+        return self._path_deltas
+
+    def explain(self, rows, block_size=2048):
+        """Per-feature contributions along each row's decision paths (Saabas attribution).
+
+        Returns (bias, contributions) where bias is the forest's mean root probability
+        and contributions has one column per feature, so that
+        ``bias + contributions.sum(axis=1)`` equals predict_proba(rows).
+
+        With a sigmoid link the attribution is done in log-odds, then each row's
+        contributions are rescaled to add up to its probability minus the bias.
+        """
+        rows = np.asarray(rows)
+        root_margin = self._margin(self.value[self.roots].sum())
+        bias = float(self._probability(root_margin))
+        if len(rows) > block_size:
+            blocks = [self.explain(rows[start:start + block_size], block_size)[1]
+                      for start in range(0, len(rows), block_size)]
+            return bias, np.concatenate(blocks)
+
+        delta_left, delta_right = self.path_deltas()
+        X = np.asarray(rows, dtype=np.float32)
+        n_rows, n_features = X.shape
+        row_index = np.arange(n_rows)[:, None]
+        offsets = row_index * n_features
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+        totals = np.zeros(n_rows * n_features)
+        for _ in range(self.max_depth):
+            feature = self.feature[nodes]
+            go_left = X[row_index, feature] <= self.threshold[nodes]
+            delta = np.where(go_left, delta_left[nodes], delta_right[nodes])
+            totals += np.bincount((offsets + feature).ravel(), weights=delta.ravel(), minlength=totals.size)
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        contributions = totals.reshape(n_rows, n_features)
+        if self.aggregation == 'mean':
+            contributions /= self.n_trees
+        if self.link == 'sigmoid':
+            margins = contributions.sum(axis=1)
+            gaps = self._probability(root_margin + margins) - bias
+            with np.errstate(divide='ignore', invalid='ignore'):
+                contributions *= np.where(margins != 0, gaps / margins, 0.0)[:, None]
+        return bias, contributions
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+EXECUTOR_KINDS = ('thread', 'process', 'inline')
+
+
+class ExecutorBusy(Exception):
+    """Raised instead of queueing when max_queue jobs are already pending"""
+
+
+def _timed_call(enqueued_at, fn, args):
+    started_at = time.monotonic()
+    result = fn(*args)
+    return started_at - enqueued_at, time.monotonic() - started_at, result
+
+
+class InferenceExecutor:
+    """Runs CPU-bound scoring off the event loop with a bounded number of pending jobs.
+
+    ``kind`` is 'thread', 'process' (worker processes set up by initializer) or
+    'inline', which calls the function on the event loop as before. Jobs beyond
+    max_queue are rejected with ExecutorBusy rather than queued. ``observer``, if
+    given, is called with the queue wait, run time and function of every completed job.
+    """
+
+    def __init__(self, kind='thread', max_workers=4, max_queue=64, initializer=None, initargs=(), observer=None):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"unknown executor kind {kind!r}, expected one of {EXECUTOR_KINDS}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.observer = observer
+        if kind == 'thread':
+            self.pool = ThreadPoolExecutor(max_workers, thread_name_prefix='inference',
+                                           initializer=initializer, initargs=initargs)
+        elif kind == 'process':
+            self.pool = ProcessPoolExecutor(max_workers, initializer=initializer, initargs=initargs)
+        else:
+            self.pool = None
+
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._lock = threading.Lock()
+
+    async def run(self, fn, *args):
+        """Result of fn(*args), computed on the pool"""
+        with self._lock:
+            if self.pending >= self.max_queue:
+                self.rejected += 1
+                raise ExecutorBusy(f"{self.pending} inference jobs pending")
+            self.pending += 1
+
+        try:
+            if self.pool is None:
+                wait, duration, result = _timed_call(time.monotonic(), fn, args)
+            else:
+                loop = asyncio.get_running_loop()
+                wait, duration, result = await loop.run_in_executor(self.pool, _timed_call, time.monotonic(),
+                                                                    fn, args)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+        with self._lock:
+            self.completed += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        if self.observer is not None:
+            self.observer(wait, duration, fn)
+        return result
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "mean_wait_seconds": self.total_wait / self.completed if self.completed else 0.0,
+                "max_wait_seconds": self.max_wait,
+            }
@@ -0,0 +1,220 @@
+"""Load test for the prediction service with payloads sampled from the Telco dataset.
+
+Starts the backend with uvicorn on a free local port (or targets --url), drives
+/predict or /predict/batch at a fixed concurrency and reports throughput plus
+p50/p95/p99 latency. Results can be saved as JSON and compared with a previous run
+made with the same endpoint, batch size and concurrency:
+
+    python loadtest.py --endpoint batch --batch-size 200 --concurrency 16 --output run.json
+    python loadtest.py --endpoint batch --batch-size 200 --concurrency 16 --compare run.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+
+from dataset import feature_records, load_telco
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Metrics compared between runs, and whether a higher value is better
+COMPARED_METRICS = {
+    'requests_per_second': True,
+    'rows_per_second': True,
+    'latency_ms.p50': False,
+    'latency_ms.p95': False,
+    'latency_ms.p99': False,
+    'error_rate': False,
+}
+
+# Run parameters two results must share to be compared at all
+COMPARABLE_CONFIG = ('endpoint', 'batch_size', 'concurrency')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, workers=1):
+    """uvicorn serving backend:app from the Backend directory, with the current environment"""
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'backend:app', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning'],
+        cwd=BACKEND_DIR,
+    )
+
+
+def wait_until_up(url, server=None, timeout=120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            raise SystemExit(f"backend exited with status {server.returncode}")
+        try:
+            if httpx.get(f"{url}/ready", timeout=2.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise SystemExit(f"backend at {url} did not come up within {timeout:.0f}s")
+
+
+def build_payloads(endpoint, count, batch_size, seed):
+    """Request bodies for the endpoint, each built from randomly sampled dataset rows"""
+    records = feature_records(load_telco())
+    rng = np.random.default_rng(seed)
+    if endpoint == 'predict':
+        return [("/predict", records[i], 1) for i in rng.integers(0, len(records), count)]
+    return [("/predict/batch", {"records": [records[i] for i in rng.integers(0, len(records), batch_size)]},
+             batch_size) for _ in range(count)]
+
+
+async def drive(url, payloads, concurrency, timeout):
+    latencies, statuses = [], {}
+    next_payload = iter(payloads)
+
+    async def worker(client):
+        for path, body, _ in next_payload:
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=body)
+                status = str(response.status_code)
+            except httpx.HTTPError as exc:
+                status = type(exc).__name__
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, statuses, elapsed
+
+
+def run_config(args):
+    return {'url': args.url, 'endpoint': args.endpoint, 'concurrency': args.concurrency, 'requests': args.requests,
+            'batch_size': args.batch_size if args.endpoint == 'batch' else 1,
+            'server_workers': args.server_workers if not args.url else None}
+
+
+def config_mismatches(config, baseline):
+    """'name: baseline -> current' for each run parameter that differs from the baseline's"""
+    baseline_config = baseline.get('config', {})
+    return [f"{name}: {baseline_config.get(name)!r} -> {config[name]!r}" for name in COMPARABLE_CONFIG
+            if baseline_config.get(name) != config[name]]
+
+
+def summarize(args, payloads, latencies, statuses, elapsed):
+    ok = statuses.get('200', 0)
+    rows = sum(n for _, _, n in payloads)
+    percentiles = np.percentile(latencies, [50, 95, 99]) if latencies else [0.0, 0.0, 0.0]
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'host': platform.node(),
+        'config': run_config(args),
+        'elapsed_seconds': elapsed,
+        'requests_per_second': len(payloads) / elapsed,
+        'rows_per_second': rows / elapsed,
+        'latency_ms': {'mean': float(np.mean(latencies)), 'p50': float(percentiles[0]),
+                       'p95': float(percentiles[1]), 'p99': float(percentiles[2]),
+                       'max': float(np.max(latencies))},
+        'status_counts': statuses,
+        'error_rate': 1 - ok / len(payloads),
+    }
+
+
+def metric(result, name):
+    value = result
+    for part in name.split('.'):
+        value = value[part]
+    return value
+
+
+def compare(current, baseline, tolerance):
+    """Print the change of each compared metric; return the names that regressed beyond tolerance"""
+    regressions = []
+    print(f"\ncompared with baseline from {baseline.get('timestamp', '?')}:")
+    for name, higher_is_better in COMPARED_METRICS.items():
+        old, new = metric(baseline, name), metric(current, name)
+        change = (new - old) / old if old else (0.0 if new == old else float('inf'))
+        worse = -change if higher_is_better else change
+        flag = ''
+        if worse > tolerance and not (name == 'error_rate' and new - old < 1e-3):
+            regressions.append(name)
+            flag = '  <-- REGRESSION'
+        print(f"  {name:<22} {old:12.3f} -> {new:12.3f}  ({change:+.1%}){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="benchmark a running service instead of starting one locally")
+    parser.add_argument('--endpoint', choices=['predict', 'batch'], default='predict')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=100, help="records per /predict/batch request")
+    parser.add_argument('--warmup', type=int, default=20, help="requests sent before measuring")
+    parser.add_argument('--server-workers', type=int, default=1, help="uvicorn workers for the local server")
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="write results as JSON")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args()
+
+    # Checked before the run: latency and throughput of different workloads say nothing about each other
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        mismatches = config_mismatches(run_config(args), baseline)
+        if mismatches:
+            raise SystemExit(f"{args.compare} was run with different parameters ({'; '.join(mismatches)}); "
+                             f"rerun with the same --endpoint, --batch-size and --concurrency")
+
+    server = None
+    url = args.url
+    if url is None:
+        url = f"http://127.0.0.1:{free_port()}"
+        server = start_server(url.rsplit(':', 1)[1], args.server_workers)
+    try:
+        wait_until_up(url, server)
+        if args.warmup:
+            asyncio.run(drive(url, build_payloads(args.endpoint, args.warmup, args.batch_size, args.seed + 1),
+                              args.concurrency, args.timeout))
+        payloads = build_payloads(args.endpoint, args.requests, args.batch_size, args.seed)
+        latencies, statuses, elapsed = asyncio.run(drive(url, payloads, args.concurrency, args.timeout))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    result = summarize(args, payloads, latencies, statuses, elapsed)
+    latency = result['latency_ms']
+    print(f"{len(payloads)} {args.endpoint} requests at concurrency {args.concurrency} in {elapsed:.2f}s")
+    print(f"  throughput  {result['requests_per_second']:,.1f} req/s  ({result['rows_per_second']:,.1f} rows/s)")
+    print(f"  latency ms  p50 {latency['p50']:.2f}  p95 {latency['p95']:.2f}  p99 {latency['p99']:.2f}  "
+          f"max {latency['max']:.2f}")
+    print(f"  statuses    {statuses}")
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(result, output_file, indent=2)
+
+    if baseline is not None and compare(result, baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
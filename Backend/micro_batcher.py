@@ -0,0 +1,98 @@
+import asyncio
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-row scoring calls into one batched call.
+
+    The first waiting row opens a batch; rows arriving within max_wait seconds join
+    it until max_batch_size is reached. ``score_batch`` is an async function taking
+    an (n, features) array and the ``model`` the rows were submitted with, and
+    returning n probabilities. Rows for different models (during a model swap) are
+    scored in separate calls. Each call runs as its own task, so the next batch is
+    collected while the previous one is scored.
+    """
+
+    def __init__(self, score_batch, max_batch_size=64, max_wait=0.002):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.rows = 0
+        self.largest_batch = 0
+        self._queue = None
+        self._task = None
+        self._inflight = set()
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.gather(*self._inflight, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("micro-batcher stopped"))
+
+    async def submit(self, row, model=None):
+        """Probability for one encoded row, scored together with its neighbours"""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((row, model, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            by_model = {}
+            for item in batch:
+                by_model.setdefault(id(item[1]), []).append(item)
+            for model_batch in by_model.values():
+                task = asyncio.create_task(self._dispatch(model_batch, model_batch[0][1]))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch, model):
+        self.batches += 1
+        self.rows += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        try:
+            probabilities = await self.score_batch(np.vstack([row for row, _, _ in batch]), model)
+        except Exception as exc:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, _, future), probability in zip(batch, probabilities):
+            if not future.done():
+                future.set_result(probability)
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_seconds": self.max_wait,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+        }
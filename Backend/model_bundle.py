@@ -0,0 +1,135 @@
+"""Versioned model bundle: the compiled forest as .npy arrays plus a JSON manifest.
+
+Bundles are loaded with memory-mapped arrays, so startup cost does not grow with the
+number of trees and every worker process on a host shares the same page cache.
+
+Export the artifacts the notebook writes (best_model.pkl, encoder.pkl, scaler.pkl):
+
+    python model_bundle.py --model best_model.pkl --encoders encoder.pkl \\
+        --scaler scaler.pkl --out bundles
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+
+from feature_encoder import FeatureEncoder
+from forest_engine import ARRAY_NAMES, CompiledForest
+
+# Format 2 records how the forest's leaf values are combined (see CompiledForest.output)
+BUNDLE_FORMAT = 2
+SUPPORTED_FORMATS = (1, 2)
+MANIFEST_NAME = 'manifest.json'
+
+
+def export_bundle(forest, feature_encoder, out_dir, version, model_hash, extra=None):
+    """Write forest arrays and manifest into out_dir/version and return that path.
+
+    The directory is assembled next to its destination and renamed into place, so a
+    reader never sees a half-written bundle.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    bundle_dir = os.path.join(out_dir, version)
+    if os.path.exists(bundle_dir):
+        raise FileExistsError(f"bundle {bundle_dir} already exists")
+
+    staging_dir = tempfile.mkdtemp(prefix=f'.{version}-', dir=out_dir)
+    try:
+        os.chmod(staging_dir, 0o755)
+        arrays = {}
+        for name, array in forest.arrays().items():
+            np.save(os.path.join(staging_dir, f'{name}.npy'), np.ascontiguousarray(array))
+            arrays[name] = {"dtype": str(array.dtype), "shape": list(array.shape)}
+
+        manifest = {
+            "format": BUNDLE_FORMAT,
+            "version": version,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "model_hash": model_hash,
+            "forest": {"n_trees": forest.n_trees, "n_nodes": forest.n_nodes,
+                       "max_depth": forest.max_depth, **forest.output(), "arrays": arrays},
+            "encoder": {"columns": feature_encoder.columns,
+                        "vocabularies": feature_encoder.vocabularies,
+                        "numerical_cols": feature_encoder.numerical_cols,
+                        "mean": feature_encoder.mean.tolist(),
+                        "scale": feature_encoder.scale.tolist()},
+            **(extra or {}),
+        }
+        with open(os.path.join(staging_dir, MANIFEST_NAME), 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        os.rename(staging_dir, bundle_dir)
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    return bundle_dir
+
+
+def read_manifest(bundle_dir):
+    with open(os.path.join(bundle_dir, MANIFEST_NAME)) as manifest_file:
+        manifest = json.load(manifest_file)
+    if manifest.get("format") not in SUPPORTED_FORMATS:
+        raise ValueError(f"{bundle_dir}: unsupported bundle format {manifest.get('format')!r}")
+    return manifest
+
+
+def load_bundle(bundle_dir, mmap=True):
+    """Return (CompiledForest, FeatureEncoder, manifest) for a bundle directory"""
+    manifest = read_manifest(bundle_dir)
+    mmap_mode = 'r' if mmap else None
+    arrays = {name: np.load(os.path.join(bundle_dir, f'{name}.npy'), mmap_mode=mmap_mode)
+              for name in ARRAY_NAMES}
+    # Format 1 bundles have no output keys and load as averaged forests
+    output = {key: value for key, value in manifest["forest"].items() if key in ('aggregation', 'base_score', 'link')}
+    forest = CompiledForest(max_depth=manifest["forest"]["max_depth"], **output, **arrays)
+
+    encoder_spec = manifest["encoder"]
+    feature_encoder = FeatureEncoder(encoder_spec["vocabularies"], encoder_spec["mean"], encoder_spec["scale"],
+                                     encoder_spec["numerical_cols"], encoder_spec["columns"])
+    return forest, feature_encoder, manifest
+
+
+def export_model(model, encoders, scaler, out_dir, version=None, model_hash=None, extra=None):
+    """Bundle an in-memory forest with its encoders and scaler.
+
+    model_hash defaults to the SHA-256 of the model's pickle; the version to its first
+    12 hex digits.
+    """
+    model_hash = model_hash or hashlib.sha256(pickle.dumps(model)).hexdigest()
+    forest = CompiledForest.from_sklearn(model)
+    feature_encoder = FeatureEncoder.from_artifacts(encoders, scaler)
+    return export_bundle(forest, feature_encoder, out_dir, version or model_hash[:12], model_hash, extra)
+
+
+def export_pickles(model_path, encoders_path, scaler_path, out_dir, version=None):
+    """Bundle the pickled forest, encoders and scaler produced by the notebook"""
+    with open(model_path, 'rb') as model_file:
+        model_bytes = model_file.read()
+    with open(encoders_path, 'rb') as encoders_file:
+        encoders = pickle.load(encoders_file)
+    with open(scaler_path, 'rb') as scaler_file:
+        scaler = pickle.load(scaler_file)
+    return export_model(pickle.loads(model_bytes), encoders, scaler, out_dir, version,
+                        hashlib.sha256(model_bytes).hexdigest())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default='best_model.pkl')
+    parser.add_argument('--encoders', default='encoder.pkl')
+    parser.add_argument('--scaler', default='scaler.pkl')
+    parser.add_argument('--out', default='bundles', help="directory the versioned bundle is written under")
+    parser.add_argument('--version', help="bundle version (default: first 12 hex digits of the model hash)")
+    args = parser.parse_args()
+
+    bundle_dir = export_pickles(args.model, args.encoders, args.scaler, args.out, args.version)
+    print(f"wrote {bundle_dir}")
+
+
+if __name__ == "__main__":
+    main()
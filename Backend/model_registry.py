@@ -0,0 +1,124 @@
+"""On-disk model registry: one model bundle directory per version under a root directory.
+
+    registry/
+        ACTIVE            name of the version the backend serves
+        3f2a9c01d4e7/     a model_bundle.py bundle: forest arrays, and a manifest.json
+        ...               holding the encoder vocabularies and scaler statistics
+
+Versions are immutable once published; switching models only rewrites ACTIVE. A
+backend started with MODEL_REGISTRY follows ACTIVE (see /admin/reload).
+
+    python model_registry.py --registry registry publish --activate
+    python model_registry.py --registry registry list
+    python model_registry.py --registry registry activate 3f2a9c01d4e7
+"""
+import argparse
+import os
+import tempfile
+
+from model_bundle import MANIFEST_NAME, export_bundle, export_model, export_pickles, read_manifest
+
+ACTIVE_NAME = 'ACTIVE'
+
+
+class ModelRegistry:
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, version):
+        bundle_dir = os.path.join(self.root, version)
+        if os.path.basename(bundle_dir) != version or not os.path.isfile(os.path.join(bundle_dir, MANIFEST_NAME)):
+            raise KeyError(f"no model version {version!r} in registry {self.root}")
+        return bundle_dir
+
+    def versions(self):
+        """Manifests of every published version, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        manifests = [read_manifest(os.path.join(self.root, name)) for name in os.listdir(self.root)
+                     if not name.startswith('.') and os.path.isfile(os.path.join(self.root, name, MANIFEST_NAME))]
+        return sorted(manifests, key=lambda manifest: manifest['created'])
+
+    def active_version(self):
+        """Version named in ACTIVE, or the newest published one if nothing was activated"""
+        try:
+            with open(os.path.join(self.root, ACTIVE_NAME)) as active_file:
+                return active_file.read().strip()
+        except FileNotFoundError:
+            versions = self.versions()
+            if not versions:
+                raise LookupError(f"registry {self.root} has no model versions") from None
+            return versions[-1]['version']
+
+    def activate(self, version):
+        """Point ACTIVE at version; written to a temporary file and renamed over the old one"""
+        self.path(version)
+        fd, tmp_path = tempfile.mkstemp(prefix=f'.{ACTIVE_NAME}-', dir=self.root)
+        try:
+            with os.fdopen(fd, 'w') as active_file:
+                active_file.write(version + '\n')
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, os.path.join(self.root, ACTIVE_NAME))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def publish(self, model_path, encoders_path, scaler_path, version=None, activate=False):
+        """Bundle the notebook's pickles as a new version; returns the version name"""
+        bundle_dir = export_pickles(model_path, encoders_path, scaler_path, self.root, version)
+        return self._published(bundle_dir, activate)
+
+    def publish_model(self, model, encoders, scaler, version=None, model_hash=None, extra=None, activate=False):
+        """Bundle an in-memory forest as a new version (see model_bundle.export_model)"""
+        bundle_dir = export_model(model, encoders, scaler, self.root, version, model_hash, extra)
+        return self._published(bundle_dir, activate)
+
+    def publish_forest(self, forest, feature_encoder, version, model_hash, extra=None, activate=False):
+        """Bundle a CompiledForest, such as a compress.py variant, as a new version"""
+        bundle_dir = export_bundle(forest, feature_encoder, self.root, version, model_hash, extra)
+        return self._published(bundle_dir, activate)
+
+    def _published(self, bundle_dir, activate):
+        version = os.path.basename(bundle_dir)
+        if activate:
+            self.activate(version)
+        return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--registry', default=os.environ.get('MODEL_REGISTRY', 'registry'))
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    publish = commands.add_parser('publish', help="add the notebook's pickles as a new version")
+    publish.add_argument('--model', default='best_model.pkl')
+    publish.add_argument('--encoders', default='encoder.pkl')
+    publish.add_argument('--scaler', default='scaler.pkl')
+    publish.add_argument('--version', help="version name (default: first 12 hex digits of the model hash)")
+    publish.add_argument('--activate', action='store_true', help="make it the version the backend serves")
+
+    commands.add_parser('list', help="published versions, oldest first")
+
+    activate = commands.add_parser('activate', help="switch the served version")
+    activate.add_argument('version')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    if args.command == 'publish':
+        version = registry.publish(args.model, args.encoders, args.scaler, args.version, args.activate)
+        print(f"published {version}" + (" (active)" if args.activate else ""))
+    elif args.command == 'activate':
+        registry.activate(args.version)
+        print(f"activated {args.version}")
+    else:
+        try:
+            active = registry.active_version()
+        except LookupError:
+            active = None
+        for manifest in registry.versions():
+            marker = '*' if manifest['version'] == active else ' '
+            print(f"{marker} {manifest['version']:<24} {manifest['created']}  {manifest['forest']['n_trees']} trees")
+
+
+if __name__ == "__main__":
+    main()
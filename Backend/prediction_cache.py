@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def canonical_key(row):
+    """Byte key for an encoded row; adding 0.0 folds -0.0 into 0.0"""
+    return (np.ascontiguousarray(row, dtype=np.float64) + 0.0).tobytes()
+
+
+class PredictionCache:
+    """Thread-safe LRU cache of churn probabilities keyed on encoded feature rows.
+
+    Entries belong to the model they were computed with: looking up under a
+    different model hash drops everything cached so far. Storing a result for any
+    model other than the one last looked up is a no-op, so requests still finishing
+    on a model that was just replaced cannot undo the switch.
+    """
+
+    def __init__(self, maxsize=10000, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl or None
+        self.model_hash = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bind(self, model_hash):
+        if model_hash != self.model_hash:
+            if self.model_hash is not None:
+                self.invalidations += 1
+            self._entries.clear()
+            self.model_hash = model_hash
+
+    def get(self, key, model_hash):
+        with self._lock:
+            self._bind(model_hash)
+            entry = self._entries.get(key)
+            if entry is not None:
+                probability, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return probability
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, probability, model_hash):
+        with self._lock:
+            if model_hash != self.model_hash:
+                return
+            self._entries[key] = (probability, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "model_hash": self.model_hash,
+            }
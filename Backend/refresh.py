@@ -0,0 +1,214 @@
+"""Grows the Random Forest with trees fitted on newly labelled customers, without a full retrain.
+
+Retraining (train.py) re-runs SMOTE and both grid searches over the whole history.
+A refresh only fits new trees:
+- the feedback file (Telco-format rows with their actual Churn) is encoded with the
+  model's own encoders and scaler, and part of it is held out
+- ``--trees`` new trees are added with warm_start, fitted on the rest of the feedback
+  plus a sample of the historical training rows the size of the feedback, weighted
+  by ``--history-weight``; with ``--date-column`` older feedback counts for less
+- classes are balanced with sample weights instead of SMOTE
+- ``--replace-oldest`` then drops as many of the oldest trees, so the forest keeps
+  its size (warm_start appends, so estimators_ is in age order)
+So the fit costs time in proportion to the feedback, not to the history. The encoded
+history split is cached on disk with joblib.Memory (keyed on the encoder and the
+history file's size and modification time), so only the first refresh reads and
+encodes the CSV.
+
+Before publishing, the old and the refreshed forest are compared:
+- on the feedback holdout, which shows whether the new trees help
+- on a fixed sample (``--history-holdout-rows``) of train.py's historical test split,
+  which shows whether the old behaviour held up
+The new version is published to the registry only if neither ROC AUC drops by more
+than ``--tolerance``.
+
+    python refresh.py feedback.csv --registry registry --activate
+    python refresh.py feedback.csv --replace-oldest --pickles .   # also rewrite best_model.pkl for the next refresh
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Memory
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from artifacts import load_pickles
+from config import CHURN_THRESHOLD
+from dataset import DATASET_PATH, fix_total_charges
+from model_registry import ModelRegistry
+
+# train.py's random state, so the historical split matches its train/test split
+RANDOM_STATE = 42
+
+
+def load_labelled(path, feature_encoder, date_column=None):
+    """Encoded rows, 0/1 labels and (with date_column) dates of a labelled Telco-format CSV.
+
+    Rows the encoder rejects, or without a Yes/No (or 1/0) Churn, are dropped;
+    returns (rows, labels, dates, dropped rows).
+    """
+    df = fix_total_charges(pd.read_csv(path), strict=False)
+    labels = df['Churn'].map({"Yes": 1, "No": 0, 1: 1, 0: 0}).to_numpy(dtype=np.float64)
+    rows, errors = feature_encoder.encode_frame(df)
+    keep = ~np.isnan(labels)
+    keep[list(errors)] = False
+    dates = pd.to_datetime(df.loc[keep, date_column], utc=True) if date_column else None
+    return rows[keep], labels[keep].astype(int), dates, int((~keep).sum())
+
+
+def _history_split(feature_encoder, path, stamp):
+    # stamp (the file's size and mtime) is only there to key the joblib cache
+    rows, labels, _, _ = load_labelled(path, feature_encoder)
+    return train_test_split(rows, labels, test_size=0.2, random_state=RANDOM_STATE)
+
+
+def history_split(feature_encoder, path=DATASET_PATH, memory=None):
+    """The historical data split as train.py splits it: (train rows, test rows, train labels, test labels).
+
+    With a joblib Memory the encoded split is cached until the file or the encoder changes.
+    """
+    split = memory.cache(_history_split) if memory is not None else _history_split
+    stat = os.stat(path)
+    return split(feature_encoder, path, (stat.st_size, stat.st_mtime_ns))
+
+
+def recency_weights(dates, half_life_days):
+    """Weight halving every half_life_days before the newest date"""
+    age_days = (dates.max() - dates).dt.total_seconds().to_numpy() / 86400
+    return 0.5 ** (age_days / half_life_days)
+
+
+def balance(weights, labels):
+    """Rescale weights so both classes carry the same total weight (in place of SMOTE)"""
+    totals = np.bincount(labels, weights=weights, minlength=2)
+    return weights * (totals.sum() / (2 * totals))[labels]
+
+
+def evaluate(model, columns, rows, labels):
+    probabilities = model.predict_proba(pd.DataFrame(rows, columns=columns))[:, 1]
+    return {"roc_auc": float(roc_auc_score(labels, probabilities)),
+            "accuracy": float(accuracy_score(labels, probabilities > CHURN_THRESHOLD))}
+
+
+def grow(model, columns, rows, labels, weights, trees, replace_oldest=False, jobs=None, seed=None):
+    """Add trees fitted on rows to model in place, dropping as many of the oldest with replace_oldest"""
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + trees, n_jobs=jobs)
+    if seed is not None:
+        model.set_params(random_state=seed)
+    model.fit(pd.DataFrame(rows, columns=columns), labels, sample_weight=weights)
+    model.set_params(warm_start=False, n_jobs=None)
+    if replace_oldest:
+        model.estimators_ = model.estimators_[trees:]
+        model.set_params(n_estimators=len(model.estimators_))
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('feedback', help="CSV of customers in the Telco format, with their actual Churn")
+    parser.add_argument('--model-dir', default='.',
+                        help="directory of the forest to refresh, with its encoder.pkl and scaler.pkl")
+    parser.add_argument('--model', default='best_model.pkl')
+    parser.add_argument('--history', default=DATASET_PATH, help="historical training data (train.py's --data)")
+    parser.add_argument('--trees', type=int, default=20, help="trees to add")
+    parser.add_argument('--replace-oldest', action='store_true', help="drop as many of the oldest trees")
+    parser.add_argument('--history-weight', type=float, default=0.5,
+                        help="weight of a historical row relative to a feedback row")
+    parser.add_argument('--date-column', help="feedback column with the date of each outcome")
+    parser.add_argument('--half-life-days', type=float, default=90,
+                        help="with --date-column, the age that halves a row's weight")
+    parser.add_argument('--holdout', type=float, default=0.2, help="fraction of the feedback held out for validation")
+    parser.add_argument('--history-holdout-rows', type=int, default=1000,
+                        help="historical test rows to validate on, a fixed sample (0: all)")
+    parser.add_argument('--cache-dir', default='.train_cache', help="joblib cache of the encoded history ('' disables)")
+    parser.add_argument('--tolerance', type=float, default=0.005, help="largest ROC AUC drop allowed on either holdout")
+    parser.add_argument('--jobs', type=int, default=-1, help="parallel tree fits (-1: all cores)")
+    parser.add_argument('--seed', type=int, help="random state for the new trees (default: the model's)")
+    parser.add_argument('--registry', default=os.environ.get('MODEL_REGISTRY', 'registry'))
+    parser.add_argument('--version', help="registry version (default: first 12 hex digits of the model hash)")
+    parser.add_argument('--activate', action='store_true', help="make the new version the one the backend serves")
+    parser.add_argument('--pickles', help="also write the refreshed forest as --model into this directory")
+    args = parser.parse_args()
+
+    timings = {}
+    started = time.perf_counter()
+    base = load_pickles(args.model_dir, model_name=args.model)
+    model, feature_encoder, columns = base.model, base.feature_encoder, base.feature_encoder.columns
+    rng = np.random.default_rng(args.seed if args.seed is not None else RANDOM_STATE)
+
+    stage = time.perf_counter()
+    rows, labels, dates, dropped = load_labelled(args.feedback, feature_encoder, args.date_column)
+    if np.bincount(labels, minlength=2).min() < 2:
+        raise SystemExit(f"{args.feedback}: need at least two customers who churned and two who did not")
+    weights = recency_weights(dates, args.half_life_days) if dates is not None else np.ones(len(rows))
+    (fit_rows, holdout_rows, fit_labels, holdout_labels,
+     fit_weights, _) = train_test_split(rows, labels, weights, test_size=args.holdout, stratify=labels,
+                                        random_state=RANDOM_STATE)
+
+    history_rows, history_test_rows, history_labels, history_test_labels = history_split(
+        feature_encoder, args.history, Memory(args.cache_dir or None, verbose=0))
+    if 0 < args.history_holdout_rows < len(history_test_rows):
+        # Seeded apart from --seed, so every refresh is validated on the same customers
+        holdout = np.random.default_rng(RANDOM_STATE).permutation(len(history_test_rows))[:args.history_holdout_rows]
+        history_test_rows, history_test_labels = history_test_rows[holdout], history_test_labels[holdout]
+    sample = rng.choice(len(history_rows), min(len(fit_rows), len(history_rows)), replace=False)
+    train_rows = np.vstack([fit_rows, history_rows[sample]])
+    train_labels = np.concatenate([fit_labels, history_labels[sample]])
+    train_weights = balance(np.concatenate([fit_weights, np.full(len(sample), args.history_weight)]), train_labels)
+    timings["prepare"] = time.perf_counter() - stage
+
+    before = {"feedback_holdout": evaluate(model, columns, holdout_rows, holdout_labels),
+              "history_test": evaluate(model, columns, history_test_rows, history_test_labels)}
+    base_trees = len(model.estimators_)
+
+    stage = time.perf_counter()
+    grow(model, columns, train_rows, train_labels, train_weights, args.trees, args.replace_oldest, args.jobs, args.seed)
+    timings["fit"] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    after = {"feedback_holdout": evaluate(model, columns, holdout_rows, holdout_labels),
+             "history_test": evaluate(model, columns, history_test_rows, history_test_labels)}
+    timings["validate"] = time.perf_counter() - stage
+    timings["total"] = time.perf_counter() - started
+
+    refresh = {
+        "base_model_hash": base.model_hash,
+        "feedback": os.path.abspath(args.feedback),
+        "feedback_rows": len(rows),
+        "feedback_rows_dropped": dropped,
+        "fit_rows": {"feedback": len(fit_rows), "history": len(sample)},
+        "holdout_rows": {"feedback": len(holdout_rows), "history": len(history_test_rows)},
+        "history_weight": args.history_weight,
+        "half_life_days": args.half_life_days if args.date_column else None,
+        "trees_added": args.trees,
+        "trees_dropped": args.trees if args.replace_oldest else 0,
+        "n_trees": {"before": base_trees, "after": len(model.estimators_)},
+        "validation": {"before": before, "after": after},
+        "timings_seconds": {name: round(seconds, 3) for name, seconds in timings.items()},
+    }
+    print(json.dumps(refresh, indent=2))
+
+    regressions = [f"{holdout} ROC AUC {before[holdout]['roc_auc']:.4f} -> {after[holdout]['roc_auc']:.4f}"
+                   for holdout in before if after[holdout]['roc_auc'] < before[holdout]['roc_auc'] - args.tolerance]
+    if regressions:
+        raise SystemExit("not published, the refreshed forest is worse: " + "; ".join(regressions))
+
+    model_bytes = pickle.dumps(model)
+    model_hash = hashlib.sha256(model_bytes).hexdigest()
+    if args.pickles:
+        os.makedirs(args.pickles, exist_ok=True)
+        with open(os.path.join(args.pickles, args.model), 'wb') as model_file:
+            model_file.write(model_bytes)
+    version = ModelRegistry(args.registry).publish_model(model, base.encoders, base.scaler, args.version, model_hash,
+                                                         extra={"refresh": refresh}, activate=args.activate)
+    print(f"published {version} to {args.registry}" + (" (active)" if args.activate else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Content negotiation for the batch scoring endpoints.
+
+JSON is the default. With an Accept header, a client can ask for one of two columnar
+bodies instead of repeating every row's keys and label strings:
+
+- ``application/vnd.apache.arrow.stream``: an Arrow IPC stream (needs pyarrow) with
+  ``probability`` (float64), ``churn`` (bool) and ``error`` (string) columns
+- ``application/x-npz``: a NumPy ``.npz`` archive with ``probability`` (float64),
+  ``churn`` (np.packbits of the labels, ``n_rows`` long) and ``errors``, the UTF-8
+  bytes of a JSON ``{row: message}`` object (a fixed-width string array would pad
+  every message to the longest one)
+
+Both bodies have one row per input record, in request order. Rows that failed
+validation have a NaN probability and an error message. The decision
+threshold travels with the payload.
+
+Compression: zstd is used when the client accepts it and ``zstandard`` is installed.
+Otherwise GZipMiddleware gzips the response as usual.
+"""
+import io
+import json
+
+import numpy as np
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+JSON = 'application/json'
+ARROW = 'application/vnd.apache.arrow.stream'
+NPZ = 'application/x-npz'
+
+ZSTD_LEVEL = 3
+
+
+def available_formats():
+    return [JSON] + ([ARROW] if pa is not None else []) + [NPZ]
+
+
+def parse_header(value):
+    """Tokens of an Accept / Accept-Encoding header, highest q first (ties keep header order)"""
+    tokens = []
+    for position, item in enumerate(value.split(',')):
+        token, *params = [part.strip() for part in item.split(';')]
+        quality = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if token and quality > 0:
+            tokens.append((-quality, position, token.lower()))
+    return [token for _, _, token in sorted(tokens)]
+
+
+def negotiate(accept):
+    """Media type to answer an Accept header with; 406 if nothing acceptable is available"""
+    if not accept:
+        return JSON
+    formats = available_formats()
+    for media_type in parse_header(accept):
+        if media_type in formats:
+            return media_type
+        if media_type in ('*/*', 'application/*'):
+            return JSON
+    raise HTTPException(status_code=406, detail=f"Supported response formats: {', '.join(formats)}")
+
+
+def accepts_zstd(accept_encoding):
+    return zstandard is not None and 'zstd' in parse_header(accept_encoding or '')
+
+
+def arrow_body(probabilities, churn, errors, metadata):
+    error_column = [None] * len(probabilities)
+    for row, message in errors.items():
+        error_column[row] = message
+    table = pa.table({'probability': probabilities, 'churn': churn, 'error': pa.array(error_column, pa.string())})
+    table = table.replace_schema_metadata({key: json.dumps(value) for key, value in metadata.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def npz_body(probabilities, churn, errors, metadata):
+    buffer = io.BytesIO()
+    np.savez(buffer, probability=probabilities, churn=np.packbits(churn), n_rows=len(churn),
+             errors=np.frombuffer(json.dumps({str(row): message for row, message in errors.items()}).encode(),
+                                  dtype=np.uint8),
+             **{key: np.asarray(value) for key, value in metadata.items()})
+    return buffer.getvalue()
+
+
+def columnar_body(media_type, probabilities, churn, errors, metadata):
+    """Encode per-row probabilities, churn labels and {row: error} as an ARROW or NPZ body"""
+    if media_type == ARROW:
+        return arrow_body(probabilities, churn, errors, metadata)
+    return npz_body(probabilities, churn, errors, metadata)
+
+
+def negotiated_response(request, media_type, content=None, body=None):
+    """Response for a JSON ``content`` or a columnar ``body``, zstd-compressed if the client accepts it"""
+    if media_type == JSON:
+        body = JSONResponse(content).body
+    headers = {'Vary': 'Accept, Accept-Encoding'}
+    if accepts_zstd(request.headers.get('accept-encoding')):
+        body = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+        headers['Content-Encoding'] = 'zstd'
+    return Response(body, media_type=media_type, headers=headers)
+
+
+def read_columnar(media_type, body):
+    """Decode an ARROW or NPZ body; returns (probabilities, churn labels, {row: error}, metadata)"""
+    if media_type == ARROW:
+        with pa.ipc.open_stream(body) as reader:
+            table = reader.read_all()
+        metadata = {key.decode(): json.loads(value) for key, value in (table.schema.metadata or {}).items()}
+        errors = {row: message for row, message in enumerate(table.column('error').to_pylist()) if message is not None}
+        return (table.column('probability').to_numpy(), table.column('churn').to_numpy(zero_copy_only=False),
+                errors, metadata)
+
+    with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+        arrays = dict(archive)
+    n_rows = int(arrays.pop('n_rows'))
+    churn = np.unpackbits(arrays.pop('churn'), count=n_rows).astype(bool)
+    errors = {int(row): message for row, message in json.loads(arrays.pop('errors').tobytes()).items()}
+    probabilities = arrays.pop('probability')
+    return probabilities, churn, errors, {key: value.item() for key, value in arrays.items()}
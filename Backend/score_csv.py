@@ -0,0 +1,175 @@
+"""Scores a customer CSV in fixed-size chunks with the backend's model artifacts.
+
+Memory stays bounded by the chunk size, whatever the size of the input. Output rows
+are ``customerID, prediction, probability``; rows that cannot be encoded get an
+empty prediction and are reported on stderr.
+
+    python score_csv.py customers.csv scores.csv --chunk-size 50000
+    python score_csv.py customers.csv scores.parquet --bundle bundles/<version>
+    python score_csv.py customers.csv scores.csv --workers 8
+    python score_csv.py customers.csv scores.csv --url http://localhost:8000
+
+With --url the chunks are posted to a running backend's /predict/batch, which
+answers in its compact columnar form (Arrow, or NPZ without pyarrow) instead of JSON.
+"""
+import argparse
+import os
+import sys
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from artifacts import load_artifacts
+from config import CHURN_THRESHOLD, MODEL_BUNDLE, USE_COMPILED_FOREST
+from dataset import FEATURE_COLUMNS, fix_total_charges
+from response_formats import ARROW, JSON, NPZ, pa, read_columnar, zstandard
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def score_chunk(artifacts, chunk, threshold=CHURN_THRESHOLD):
+    """Score one DataFrame of raw customer rows; returns (scores, {row position: error})"""
+    chunk = fix_total_charges(chunk.copy(), strict=False)
+    rows, errors = artifacts.feature_encoder.encode_frame(chunk)
+
+    valid = np.ones(len(chunk), dtype=bool)
+    valid[list(errors)] = False
+    probabilities = np.full(len(chunk), np.nan)
+    if valid.any():
+        probabilities[valid] = artifacts.probabilities(rows[valid])
+
+    predictions = np.where(probabilities > threshold, "Churn", "No Churn").astype(object)
+    predictions[~valid] = ""
+    customer_ids = chunk['customerID'].to_numpy() if 'customerID' in chunk else chunk.index.to_numpy()
+    scores = pd.DataFrame({'customerID': customer_ids, 'prediction': predictions, 'probability': probabilities})
+    return scores, errors
+
+
+def remote_client(url, timeout=300.0):
+    accept = f"{ARROW}, {NPZ};q=0.9" if pa is not None else NPZ
+    encoding = "zstd, gzip" if zstandard is not None else "gzip"
+    return httpx.Client(base_url=url, timeout=timeout, headers={'Accept': accept, 'Accept-Encoding': encoding})
+
+
+def score_remote_chunk(client, chunk, threshold=CHURN_THRESHOLD):
+    """score_chunk against a running backend's /predict/batch"""
+    chunk = fix_total_charges(chunk.copy(), strict=False)
+    records = chunk.reindex(columns=FEATURE_COLUMNS).to_json(orient='records')
+    response = client.post('/predict/batch', content=f'{{"records": {records}}}', headers={'Content-Type': JSON})
+    response.raise_for_status()
+    media_type = response.headers['content-type'].split(';')[0]
+    probabilities, _, errors, _ = read_columnar(media_type, response.content)
+
+    predictions = np.where(probabilities > threshold, "Churn", "No Churn").astype(object)
+    predictions[list(errors)] = ""
+    customer_ids = chunk['customerID'].to_numpy() if 'customerID' in chunk else chunk.index.to_numpy()
+    scores = pd.DataFrame({'customerID': customer_ids, 'prediction': predictions, 'probability': probabilities})
+    return scores, errors
+
+
+class CsvSink:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.header = True
+
+    def write(self, scores):
+        scores.to_csv(self.file, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow") from None
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.writer = None
+
+    def write(self, scores):
+        table = self.pa.Table.from_pandas(scores.astype({'customerID': str}), preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def open_sink(path, output_format=None):
+    output_format = output_format or ('parquet' if path.endswith(('.parquet', '.pq')) else 'csv')
+    return ParquetSink(path) if output_format == 'parquet' else CsvSink(path)
+
+
+def read_chunks(path, chunk_size):
+    return pd.read_csv(path, chunksize=chunk_size, dtype={'customerID': str})
+
+
+def report_errors(errors, offset, limit=5):
+    for position, message in list(errors.items())[:limit]:
+        print(f"row {offset + position}: {message}", file=sys.stderr)
+    if len(errors) > limit:
+        print(f"... and {len(errors) - limit} more invalid rows in this chunk", file=sys.stderr)
+
+
+def iter_scores(chunks, args):
+    """score_chunk results for every chunk, in order, in this process, a worker pool or a remote backend"""
+    if args.url:
+        client = remote_client(args.url)
+        return (score_remote_chunk(client, chunk, args.threshold) for chunk in chunks)
+    if args.workers > 1:
+        from bulk_score import score_parallel
+        return score_parallel(chunks, args.threshold, args.workers, args.bundle, args.model_dir, args.compiled)
+
+    artifacts = load_artifacts(args.bundle, args.model_dir, compile_forest=args.compiled)
+    return (score_chunk(artifacts, chunk, args.threshold) for chunk in chunks)
+
+
+def add_artifact_arguments(parser):
+    parser.add_argument('--bundle', default=MODEL_BUNDLE, help="model bundle directory (default: $MODEL_BUNDLE)")
+    parser.add_argument('--model-dir', default=BACKEND_DIR, help="directory holding the .pkl artifacts")
+    parser.add_argument('--compiled', action='store_true', default=USE_COMPILED_FOREST,
+                        help="score the pickled forest with the compiled array engine")
+    parser.add_argument('--threshold', type=float, default=CHURN_THRESHOLD)
+    parser.add_argument('--workers', type=int, default=1, help="worker processes (1 scores in-process)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('input', help="customer CSV with the PredictionRequest columns")
+    parser.add_argument('output', help="scores file (.csv or .parquet)")
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--format', choices=['csv', 'parquet'], help="default: from the output extension")
+    parser.add_argument('--url', help="score with a running backend instead of local artifacts")
+    add_artifact_arguments(parser)
+    args = parser.parse_args()
+
+    sink = open_sink(args.output, args.format)
+    start = time.perf_counter()
+    scored = invalid = 0
+    try:
+        for scores, errors in iter_scores(read_chunks(args.input, args.chunk_size), args):
+            sink.write(scores)
+            report_errors(errors, scored)
+            scored += len(scores)
+            invalid += len(errors)
+            elapsed = time.perf_counter() - start
+            print(f"{scored} rows, {scored / elapsed:,.0f} rows/sec", file=sys.stderr)
+    finally:
+        sink.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"scored {scored} rows ({invalid} invalid) in {elapsed:.2f}s: "
+          f"{scored / elapsed if elapsed else 0:,.0f} rows/sec with {args.url or f'{args.workers} worker(s)'}")
+
+
+if __name__ == "__main__":
+    main()
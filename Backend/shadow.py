@@ -0,0 +1,91 @@
+"""Shadow scoring log: the served and the shadow model's predictions for sampled requests.
+
+The backend appends one JSON line per sampled request (see SECONDARY_MODE in
+config.py) with both models' probabilities and latencies. Summarize a log:
+
+    python shadow.py shadow_log.jsonl
+"""
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from config import CHURN_THRESHOLD
+
+
+class ShadowLog:
+    """Appends JSON lines to path; safe to share between threads"""
+
+    def __init__(self, path):
+        self.path = path
+        self.written = 0
+        self._lock = threading.Lock()
+
+    def write(self, entry):
+        line = json.dumps(entry) + '\n'
+        with self._lock:
+            with open(self.path, 'a') as log_file:
+                log_file.write(line)
+            self.written += 1
+
+
+def shadow_score(shadow_artifacts, shadow_log, rows, primary_probabilities, primary_version, primary_seconds,
+                 endpoint):
+    """Score rows with the shadow model and log the pair; runs on the shadow executor"""
+    started = time.perf_counter()
+    probabilities = shadow_artifacts.probabilities(rows)
+    shadow_seconds = time.perf_counter() - started
+    shadow_log.write({
+        "time": datetime.now(timezone.utc).isoformat(),
+        "endpoint": endpoint,
+        "rows": len(rows),
+        "primary_version": primary_version,
+        "shadow_version": shadow_artifacts.version,
+        "primary_seconds": primary_seconds,
+        "shadow_seconds": shadow_seconds,
+        "primary": np.asarray(primary_probabilities, dtype=float).tolist(),
+        "shadow": probabilities.tolist(),
+    })
+
+
+def summarize(path, threshold=CHURN_THRESHOLD):
+    """Agreement and latency of each (primary, shadow) version pair in a shadow log"""
+    requests = pd.read_json(path, lines=True)
+    summaries = []
+    for (primary_version, shadow_version), pair in requests.groupby(['primary_version', 'shadow_version']):
+        primary = np.concatenate(pair['primary'].map(np.asarray).to_numpy())
+        shadow = np.concatenate(pair['shadow'].map(np.asarray).to_numpy())
+        single = pair[pair['rows'] == 1]
+        summaries.append({
+            "primary_version": primary_version,
+            "shadow_version": shadow_version,
+            "requests": len(pair),
+            "rows": len(primary),
+            "label_agreement": float(np.mean((primary > threshold) == (shadow > threshold))),
+            "primary_churn_rate": float(np.mean(primary > threshold)),
+            "shadow_churn_rate": float(np.mean(shadow > threshold)),
+            "mean_abs_difference": float(np.mean(np.abs(primary - shadow))),
+            "correlation": float(np.corrcoef(primary, shadow)[0, 1]) if len(primary) > 1 else None,
+            # Latencies of single-row requests, so batch sizes don't skew them
+            "primary_request_p50_ms": float(single['primary_seconds'].quantile(0.5) * 1000) if len(single) else None,
+            "primary_request_p95_ms": float(single['primary_seconds'].quantile(0.95) * 1000) if len(single) else None,
+            "shadow_score_p50_ms": float(single['shadow_seconds'].quantile(0.5) * 1000) if len(single) else None,
+            "shadow_score_p95_ms": float(single['shadow_seconds'].quantile(0.95) * 1000) if len(single) else None,
+        })
+    return summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('log', nargs='?', default='shadow_log.jsonl')
+    parser.add_argument('--threshold', type=float, default=CHURN_THRESHOLD)
+    args = parser.parse_args()
+    print(json.dumps(summarize(args.log, args.threshold), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Trains the churn models as Notebooks/churn_prediction.ipynb does and publishes a bundle.
+
+Preprocessing follows the notebook step for step:
+- blank TotalCharges become 0.0
+- every text column is label-encoded
+- tenure, MonthlyCharges and TotalCharges are standardized
+- the data is split 80/20 (random_state 42)
+- SMOTE oversamples the training part
+
+Both grids are searched with 5-fold CV on accuracy. The (parameters, fold) fits run
+in parallel across cores and are cached on disk with joblib.Memory, so a re-run
+with the same data and grid only fits what changed. The Random Forest is published
+to a model registry, together with the run's scores, timings and peak memory.
+
+    python train.py --registry registry --activate
+    python train.py --models rf --pickles .   # also rewrite best_model.pkl, encoder.pkl, scaler.pkl here
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import resource
+import time
+
+import numpy as np
+import pandas as pd
+from imblearn.over_sampling import SMOTE
+from joblib import Memory, Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold, train_test_split
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from dataset import DATASET_PATH, fix_total_charges
+from feature_encoder import CATEGORICAL_COLS, NUMERICAL_COLS
+from model_registry import ModelRegistry
+
+RANDOM_STATE = 42
+
+
+def random_forest():
+    return RandomForestClassifier(random_state=RANDOM_STATE)
+
+
+def xgboost():
+    from xgboost import XGBClassifier
+    return XGBClassifier(random_state=RANDOM_STATE)
+
+
+# Estimator factory and the notebook's hyperparameter grid for each model
+MODELS = {
+    'rf': (random_forest, {"n_estimators": [50, 100, 200], "max_depth": [5, 10, None]}),
+    'xgb': (xgboost, {"learning_rate": [0.01, 0.1, 0.2], "max_depth": [3, 5, 7]}),
+}
+
+# File each model is pickled to with --pickles
+PICKLE_NAMES = {'rf': 'best_model.pkl', 'xgb': 'xgb_model.pkl'}
+
+
+def preprocess(df):
+    """Features, labels, fitted label encoders and scaler, as in the notebook.
+
+    Like the notebook, the encoders and scaler are fitted on the whole dataset
+    before the train/test split.
+    """
+    df = fix_total_charges(df.drop(columns=['customerID']))
+    df['Churn'] = df['Churn'].map({"Yes": 1, "No": 0})
+
+    encoders = {}
+    for column in CATEGORICAL_COLS:
+        encoders[column] = LabelEncoder()
+        df[column] = encoders[column].fit_transform(df[column])
+    scaler = StandardScaler()
+    df[NUMERICAL_COLS] = scaler.fit_transform(df[NUMERICAL_COLS])
+    return df.drop(columns=['Churn']), df['Churn'], encoders, scaler
+
+
+def fit_fold(model_name, params, X, y, train, test):
+    """Accuracy of one (parameters, fold) fit"""
+    estimator = MODELS[model_name][0]().set_params(**params)
+    estimator.fit(X.iloc[train], y.iloc[train])
+    return accuracy_score(y.iloc[test], estimator.predict(X.iloc[test]))
+
+
+def fit_model(model_name, params, X, y):
+    return MODELS[model_name][0]().set_params(**params).fit(X, y)
+
+
+def grid_search(model_name, X, y, memory, n_jobs, cv=5):
+    """GridSearchCV(cv=5, scoring='accuracy') over the model's grid, one cached job per fit.
+
+    Returns (best estimator refitted on X, y, best params, mean CV accuracy per params).
+    """
+    grid = list(ParameterGrid(MODELS[model_name][1]))
+    folds = list(StratifiedKFold(cv).split(X, y))
+    cached_fit_fold = memory.cache(fit_fold)
+    scores = Parallel(n_jobs=n_jobs)(delayed(cached_fit_fold)(model_name, params, X, y, train, test)
+                                     for params in grid for train, test in folds)
+    mean_scores = np.asarray(scores).reshape(len(grid), cv).mean(axis=1)
+    # First of equally good candidates, as GridSearchCV picks
+    best = int(np.argmax(mean_scores))
+    model = memory.cache(fit_model)(model_name, grid[best], X, y)
+    return model, grid[best], [{"params": params, "mean_accuracy": float(score)}
+                               for params, score in zip(grid, mean_scores)]
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process and of its finished children (ru_maxrss is in KiB on Linux)"""
+    self_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children_peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return {"process": round(self_peak, 1), "children": round(children_peak, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default=DATASET_PATH)
+    parser.add_argument('--models', nargs='+', choices=list(MODELS), default=list(MODELS))
+    parser.add_argument('--jobs', type=int, default=-1, help="parallel fits (-1: all cores)")
+    parser.add_argument('--cache-dir', default='.train_cache', help="joblib cache of fitted folds ('' disables)")
+    parser.add_argument('--registry', default=os.environ.get('MODEL_REGISTRY', 'registry'))
+    parser.add_argument('--version', help="registry version (default: first 12 hex digits of the model hash)")
+    parser.add_argument('--activate', action='store_true', help="make the new version the one the backend serves")
+    parser.add_argument('--pickles', help="also write the notebook-style .pkl artifacts into this directory")
+    args = parser.parse_args()
+
+    memory = Memory(args.cache_dir or None, verbose=0)
+    timings = {}
+    started = time.perf_counter()
+
+    stage = time.perf_counter()
+    X, y, encoders, scaler = preprocess(pd.read_csv(args.data))
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=RANDOM_STATE)
+    X_train_smote, y_train_smote = SMOTE(random_state=RANDOM_STATE).fit_resample(X_train, y_train)
+    timings["preprocess"] = time.perf_counter() - stage
+
+    models, results = {}, {}
+    for model_name in args.models:
+        stage = time.perf_counter()
+        try:
+            model, params, cv_results = grid_search(model_name, X_train_smote, y_train_smote, memory, args.jobs)
+        except ImportError as exc:
+            print(f"skipping {model_name}: {exc}")
+            continue
+        timings[f"search_{model_name}"] = time.perf_counter() - stage
+
+        probabilities = model.predict_proba(X_test)[:, 1]
+        models[model_name] = model
+        results[model_name] = {
+            "best_params": params,
+            "cv_accuracy": max(result["mean_accuracy"] for result in cv_results),
+            "test_accuracy": float(accuracy_score(y_test, model.predict(X_test))),
+            "test_roc_auc": float(roc_auc_score(y_test, probabilities)),
+            "cv_results": cv_results,
+        }
+        print(f"{model_name}: best {params}, cv accuracy {results[model_name]['cv_accuracy']:.4f}, "
+              f"test accuracy {results[model_name]['test_accuracy']:.4f}, "
+              f"test ROC AUC {results[model_name]['test_roc_auc']:.4f}")
+
+    if 'rf' not in models:
+        raise SystemExit("only the Random Forest can be bundled for the backend; include it in --models")
+
+    model_bytes = pickle.dumps(models['rf'])
+    model_hash = hashlib.sha256(model_bytes).hexdigest()
+    if args.pickles:
+        os.makedirs(args.pickles, exist_ok=True)
+        for model_name, model in models.items():
+            with open(os.path.join(args.pickles, PICKLE_NAMES[model_name]), 'wb') as model_file:
+                model_file.write(model_bytes if model_name == 'rf' else pickle.dumps(model))
+        with open(os.path.join(args.pickles, 'encoder.pkl'), 'wb') as encoders_file:
+            pickle.dump(encoders, encoders_file)
+        with open(os.path.join(args.pickles, 'scaler.pkl'), 'wb') as scaler_file:
+            pickle.dump(scaler, scaler_file)
+
+    timings["total"] = time.perf_counter() - started
+    training = {
+        "data": os.path.abspath(args.data),
+        "rows": len(X),
+        "train_rows_after_smote": len(X_train_smote),
+        "test_rows": len(X_test),
+        "jobs": args.jobs,
+        "cpu_count": os.cpu_count(),
+        "models": results,
+        "timings_seconds": {name: round(seconds, 3) for name, seconds in timings.items()},
+        "peak_memory_mb": peak_memory_mb(),
+    }
+    version = ModelRegistry(args.registry).publish_model(models['rf'], encoders, scaler, args.version, model_hash,
+                                                         extra={"training": training}, activate=args.activate)
+
+    print(json.dumps({key: value for key, value in training.items() if key != "models"}, indent=2))
+    print(f"published {version} to {args.registry}" + (" (active)" if args.activate else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""What-if grids: one customer with some fields swept over a set of values.
+
+The grid is the Cartesian product of the swept fields' values. Every other field
+keeps the customer's value. It is built directly in encoded space:
+- the customer is encoded once and the row repeated
+- each swept field's column is filled from its values, each encoded only once
+So the whole grid costs a few numpy operations to build and one forest pass to score.
+"""
+import numpy as np
+
+
+def grid_rows(feature_encoder, record, axes, derive_total_charges=False):
+    """Encoded rows for every combination of axes, a list of (field, values).
+
+    Rows are in C order over the axes (the last axis varies fastest), so the
+    probabilities reshape to ``shape``. With derive_total_charges, TotalCharges
+    follows tenure * MonthlyCharges at every grid point, as in the Streamlit form.
+    Returns (rows, shape).
+    """
+    shape = tuple(len(values) for _, values in axes)
+    base = feature_encoder.encode(record)
+    rows = np.tile(base, (int(np.prod(shape)), 1))
+    index = np.indices(shape).reshape(len(shape), -1)
+    columns = feature_encoder.columns
+    for axis, (col, values) in enumerate(axes):
+        rows[:, columns.index(col)] = feature_encoder.encode_values(col, values)[index[axis]]
+
+    if derive_total_charges:
+        swept = {col: np.asarray(values, dtype=np.float64)[index[axis]] for axis, (col, values) in enumerate(axes)
+                 if col in ('tenure', 'MonthlyCharges')}
+        with np.errstate(over='ignore'):  # an overflowing product is rejected by encode_values below
+            total = swept.get('tenure', record['tenure']) * swept.get('MonthlyCharges', record['MonthlyCharges'])
+        rows[:, columns.index('TotalCharges')] = feature_encoder.encode_values(
+            'TotalCharges', np.broadcast_to(total, len(rows)))
+    return rows, shape
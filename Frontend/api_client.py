@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+import pyarrow as pa
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+
+# FastAPI backend URL (FASTAPI_URL overrides it, e.g. for a local backend)
+FASTAPI_URL = os.environ.get("FASTAPI_URL", "https://churn-prediction-zb7k.onrender.com")
+
+# Timeout (seconds) for the cheap /health and /ready probes
+HEALTH_TIMEOUT = 3
+
+# Columnar /predict/batch response; far smaller than JSON for large batches
+ARROW = "application/vnd.apache.arrow.stream"
+
+
+@st.cache_resource
+def get_session():
+    """Shared keep-alive session, kept across Streamlit reruns and sessions.
+
+    Retries with backoff on 502/503/504, which a cold or overloaded backend returns
+    while it starts up or sheds load. Scoring is side-effect free, so POSTs are
+    retried as well.
+    """
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    # gzip and deflate, plus zstd (and br) when urllib3 has a decoder for them
+    session.headers.update({"Accept-Encoding": ACCEPT_ENCODING})
+    return session
+
+
+def wake_backend(session, url):
+    """Ping /health so a sleeping backend starts booting, without holding up the page"""
+    try:
+        session.get(f"{url}/health", timeout=HEALTH_TIMEOUT)
+    except requests.RequestException:
+        pass
+
+
+def read_batch_response(response):
+    """(probabilities, predictions, errors) arrays from an Arrow or JSON /predict/batch response"""
+    if response.headers.get("Content-Type", "").startswith(ARROW):
+        with pa.ipc.open_stream(response.content) as reader:
+            table = reader.read_all()
+        probabilities = table.column("probability").to_numpy()
+        churn = table.column("churn").to_numpy(zero_copy_only=False)
+        errors = np.array(table.column("error").fill_null("").to_pylist(), dtype=object)
+        predictions = np.where(churn, "Churn", "No Churn").astype(object)
+        predictions[errors != ""] = ""
+        return probabilities, predictions, errors
+
+    results = response.json()["results"]
+    probabilities = np.array([result.get("probability", np.nan) for result in results], dtype=float)
+    predictions = np.array([result.get("prediction", "") for result in results], dtype=object)
+    errors = np.array([result.get("error", "") for result in results], dtype=object)
+    return probabilities, predictions, errors
+
+
+def score_batch_api_call(records, timeout=60):
+    """POST records to /predict/batch, asking for the Arrow form.
+
+    Returns ((probabilities, predictions, errors) in input order, None) or (None, error).
+    """
+    try:
+        response = get_session().post(f"{FASTAPI_URL}/predict/batch", json={"records": records}, timeout=timeout,
+                                      headers={"Accept": f"{ARROW}, application/json;q=0.5"})
+        if response.status_code == 200:
+            return read_batch_response(response), None
+        return None, f"API Error: {response.status_code} - {response.text[:500]}"
+    except requests.exceptions.ConnectionError:
+        return None, "❌ Connection Error: Unable to connect to the prediction service."
+    except requests.exceptions.Timeout:
+        return None, "⏱️ Timeout Error: The prediction service is taking too long to respond."
+    except requests.RequestException as e:
+        return None, f"❌ Unexpected Error: {str(e)}"
+
+
+def whatif_api_call(customer, variations, derive_total_charges=True, timeout=30):
+    """POST one customer and its variations to /whatif; every combination is scored in one request.
+
+    Returns (response JSON, None) or (None, error).
+    """
+    try:
+        response = get_session().post(f"{FASTAPI_URL}/whatif", timeout=timeout,
+                                      json={"customer": customer, "variations": variations,
+                                            "derive_total_charges": derive_total_charges})
+        if response.status_code == 200:
+            return response.json(), None
+        return None, f"API Error: {response.status_code} - {response.text[:500]}"
+    except requests.exceptions.ConnectionError:
+        return None, "❌ Connection Error: Unable to connect to the prediction service."
+    except requests.exceptions.Timeout:
+        return None, "⏱️ Timeout Error: The prediction service is taking too long to respond."
+    except requests.RequestException as e:
+        return None, f"❌ Unexpected Error: {str(e)}"
@@ -1,10 +1,15 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import requests
 import plotly.graph_objects as go
 import plotly.express as px
+import threading
 from datetime import datetime
 
+from api_client import FASTAPI_URL, HEALTH_TIMEOUT, get_session, wake_backend, whatif_api_call
+from validation import validate_inputs
+
 
 # Configure page
 st.set_page_config(
@@ -15,14 +20,10 @@ st.set_page_config(
 )
 
 
-# FastAPI backend URL 
-FASTAPI_URL = "https://churn-prediction-zb7k.onrender.com"  
-
-# Send wake-up request
-try:
-    response = requests.get(FASTAPI_URL, timeout=15)
-except requests.RequestException:
-    pass
+# Send wake-up request in the background, once per session
+if 'backend_woken' not in st.session_state:
+    st.session_state.backend_woken = True
+    threading.Thread(target=wake_backend, args=(get_session(), FASTAPI_URL), daemon=True).start()
 
 # Custom CSS 
 st.markdown("""
@@ -260,12 +261,43 @@ if 'predictions_count' not in st.session_state:
     st.session_state.predictions_count = 0
 if 'last_churn_probability' not in st.session_state:  
     st.session_state.last_churn_probability = None
+if 'risk_contributions' not in st.session_state:
+    st.session_state.risk_contributions = None
+if 'whatif_result' not in st.session_state:
+    st.session_state.whatif_result = None
+
+# Labels for the model's features in the Key Risk Indicators panel
+FEATURE_LABELS = {
+    "gender": "🧑 Gender",
+    "SeniorCitizen": "👴 Senior citizen",
+    "Partner": "💔 Partner",
+    "Dependents": "👥 Dependents",
+    "tenure": "⏰ Tenure (months)",
+    "PhoneService": "📞 Phone service",
+    "MultipleLines": "📶 Multiple lines",
+    "InternetService": "🌐 Internet service",
+    "OnlineSecurity": "🔒 Online security",
+    "OnlineBackup": "💾 Online backup",
+    "DeviceProtection": "🛡️ Device protection",
+    "TechSupport": "🧰 Tech support",
+    "StreamingTV": "📺 Streaming TV",
+    "StreamingMovies": "🎬 Streaming movies",
+    "Contract": "📄 Contract",
+    "PaperlessBilling": "📧 Paperless billing",
+    "PaymentMethod": "💳 Payment method",
+    "MonthlyCharges": "💰 Monthly charges",
+    "TotalCharges": "🧾 Total charges",
+}
 
 # Function to make API call to  backend
 def make_prediction_api_call(data):
-    """Make API call to backend for prediction"""
+    """Make API call to backend for prediction, with per-feature contributions when available"""
     try:
-        response = requests.post(f"{FASTAPI_URL}/predict", json=data, timeout=30)
+        response = get_session().post(f"{FASTAPI_URL}/explain", json=data, timeout=30)
+        if response.status_code == 404:
+            # Explanations disabled, or not available for the model this customer is routed to:
+            # plain prediction only (from the same model, as routing follows the record)
+            response = get_session().post(f"{FASTAPI_URL}/predict", json=data, timeout=30)
         if response.status_code == 200:
             return response.json(), None
         else:
@@ -277,24 +309,6 @@ def make_prediction_api_call(data):
     except Exception as e:
         return None, f"❌ Unexpected Error: {str(e)}"
 
-# Function to validate input data
-def validate_inputs(data):
-    """Validate input data before sending to API"""
-    errors = []
-    
-    if data['tenure'] < 0 or data['tenure'] > 100:
-        errors.append("Tenure must be between 0 and 100 months")
-    
-    if data['MonthlyCharges'] <= 0 or data['MonthlyCharges'] > 1000:
-        errors.append("Monthly charges must be between 0 and 1000")
-    
-    if data['TotalCharges'] < 0 or data['TotalCharges'] > 100000:
-        errors.append("Total charges must be between 0 and 100,000")
-    
-    # Removed the validation that checked if TotalCharges < MonthlyCharges since it's now auto-calculated
-    
-    return errors
-
 # Header
 st.markdown("""
 <div class="main-header">
@@ -310,12 +324,12 @@ with st.sidebar:
     if st.button("🔍 Test API Connection"):
         with st.spinner("Testing connection..."):
             try:
-                response = requests.get(f"{FASTAPI_URL}/docs", timeout=5)
+                response = get_session().get(f"{FASTAPI_URL}/health", timeout=HEALTH_TIMEOUT)
                 if response.status_code == 200:
                     st.success("✅ FastAPI server is running!")
                 else:
                     st.error("❌ FastAPI server responded with error")
-            except:
+            except requests.RequestException:
                 st.error("❌ Cannot connect to FastAPI server")
                 st.info(f"Make sure your FastAPI server is running at: {FASTAPI_URL}")
 
@@ -403,31 +417,31 @@ with col2:
     </div>
     """, unsafe_allow_html=True)
     
+    # data for API call, also the base customer of the what-if analysis
+    api_data = {
+        "gender": gender,
+        "SeniorCitizen": 1 if senior_citizen == "Yes" else 0,
+        "Partner": partner,
+        "Dependents": dependents,
+        "tenure": int(tenure),
+        "PhoneService": phone_service,
+        "MultipleLines": multiple_lines,
+        "InternetService": internet_service,
+        "OnlineSecurity": online_security,
+        "OnlineBackup": online_backup,
+        "DeviceProtection": device_protection,
+        "TechSupport": tech_support,
+        "StreamingTV": streaming_tv,
+        "StreamingMovies": streaming_movies,
+        "Contract": contract,
+        "PaperlessBilling": paperless_billing,
+        "PaymentMethod": payment_method,
+        "MonthlyCharges": float(monthly_charges),
+        "TotalCharges": float(total_charges)  
+    }
+    
     # Predict button
     if st.button("🎯 Predict Churn Risk", key="predict_btn"):
-        # data for API call 
-        api_data = {
-            "gender": gender,
-            "SeniorCitizen": 1 if senior_citizen == "Yes" else 0,
-            "Partner": partner,
-            "Dependents": dependents,
-            "tenure": int(tenure),
-            "PhoneService": phone_service,
-            "MultipleLines": multiple_lines,
-            "InternetService": internet_service,
-            "OnlineSecurity": online_security,
-            "OnlineBackup": online_backup,
-            "DeviceProtection": device_protection,
-            "TechSupport": tech_support,
-            "StreamingTV": streaming_tv,
-            "StreamingMovies": streaming_movies,
-            "Contract": contract,
-            "PaperlessBilling": paperless_billing,
-            "PaymentMethod": payment_method,
-            "MonthlyCharges": float(monthly_charges),
-            "TotalCharges": float(total_charges)  
-        }
-        
         # Validate inputs
         validation_errors = validate_inputs(api_data)
         
@@ -455,6 +469,7 @@ with col2:
                     st.session_state.churn_probability = result['probability']
                     st.session_state.prediction_result = result['prediction']
                     st.session_state.last_churn_probability = result['probability']
+                    st.session_state.risk_contributions = result.get('contributions')
                     st.session_state.prediction_made = True
                     
                     # Incrementing predictions count only when a new prediction is made
@@ -547,7 +562,7 @@ with col2:
         st.metric("Monthly Charges", f"${monthly_charges:.2f}")
         st.metric("Total Charges", f"${total_charges:.2f}")
     
-    # Risk factors analysis (based on common churn indicators)
+    # Risk factors analysis: the features that pushed this prediction towards churn
     if st.session_state.prediction_made:
         st.markdown("""
         <div class="metric-card">
@@ -555,32 +570,113 @@ with col2:
         </div>
         """, unsafe_allow_html=True)
         
-        risk_factors = []
-        
-        if senior_citizen == "Yes":
-            risk_factors.append("👴 Senior citizen")
-        if partner == "No":
-            risk_factors.append("💔 No partner")
-        if dependents == "No":
-            risk_factors.append("👥 No dependents")
-        if tenure < 12:
-            risk_factors.append("⏰ Short tenure")
-        if contract == "Month-to-month":
-            risk_factors.append("📄 Month-to-month contract")
-        if payment_method == "Electronic check":
-            risk_factors.append("💳 Electronic check payment")
-        if monthly_charges > 80:
-            risk_factors.append("💰 High monthly charges")
-        if internet_service == "Fiber optic" and online_security == "No":
-            risk_factors.append("🔒 No online security with fiber")
-        if paperless_billing == "Yes":
-            risk_factors.append("📧 Paperless billing")
-        
-        if risk_factors:
-            for factor in risk_factors[:6]:  # Shows top 6 risk factors
-                st.markdown(f"• {factor}")
+        contributions = st.session_state.risk_contributions
+        if contributions is not None:
+            # Sorted by the backend, largest increase in churn probability first
+            risk_factors = [factor for factor in contributions if factor['contribution'] >= 0.005]
+            
+            if risk_factors:
+                for factor in risk_factors[:6]:  # Shows top 6 risk factors
+                    value = factor['value']
+                    if factor['feature'] == 'SeniorCitizen':
+                        value = "Yes" if value == 1 else "No"
+                    elif isinstance(value, float):
+                        value = f"{value:,.2f}"
+                    label = FEATURE_LABELS.get(factor['feature'], factor['feature'])
+                    st.markdown(f"• {label}: **{value}** (+{factor['contribution']:.1%})")
+                
+                top = contributions[:6] + sorted(contributions, key=lambda f: f['contribution'])[:3]
+                fig = go.Figure(go.Bar(
+                    x=[f['contribution'] * 100 for f in top],
+                    y=[FEATURE_LABELS.get(f['feature'], f['feature']) for f in top],
+                    orientation='h',
+                    marker_color=['#ef4444' if f['contribution'] > 0 else '#22c55e' for f in top],
+                ))
+                fig.update_layout(height=300, margin=dict(l=20, r=20, t=30, b=20),
+                                  title="Contribution to churn probability (pp)",
+                                  yaxis=dict(autorange="reversed"))
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.markdown("• ✅ No major risk factors identified")
         else:
-            st.markdown("• ✅ No major risk factors identified")
+            st.info("Per-feature explanations are not available from the prediction service.")
+
+# What-if analysis: tenure x monthly charges x contract for this customer, scored in one /whatif call
+st.markdown("---")
+st.markdown("""
+<div class="input-section">
+    <div class="section-header">🔬 What-if Analysis</div>
+</div>
+""", unsafe_allow_html=True)
+st.caption("How this customer's churn risk changes with tenure, monthly charges and contract. "
+           "Total charges follow tenure × monthly charges, as in the form above.")
+
+whatif_col1, whatif_col2, whatif_col3 = st.columns(3)
+with whatif_col1:
+    whatif_tenure = st.slider("Tenure range (months)", 0, 100, (0, 72))
+with whatif_col2:
+    whatif_charges = st.slider("Monthly charges range ($)", 1.0, 200.0, (18.0, 120.0), step=1.0)
+with whatif_col3:
+    whatif_contracts = st.multiselect("Contracts", ["Month-to-month", "One year", "Two year"],
+                                      default=["Month-to-month", "One year", "Two year"])
+
+if st.button("🔬 Run What-if Analysis", disabled=not whatif_contracts):
+    validation_errors = validate_inputs(api_data)
+    if validation_errors:
+        st.error("⚠️ " + "; ".join(validation_errors))
+    else:
+        with st.spinner("🔄 Scoring every combination..."):
+            result, error = whatif_api_call(api_data, {
+                "tenure": {"start": whatif_tenure[0], "stop": whatif_tenure[1], "steps": 25},
+                "MonthlyCharges": {"start": whatif_charges[0], "stop": whatif_charges[1], "steps": 25},
+                "Contract": whatif_contracts,
+            })
+        if error:
+            st.error(f"{error}\n\nPrediction service: {FASTAPI_URL}")
+        else:
+            # Kept with the customer it was run for, so charts survive reruns without another request
+            st.session_state.whatif_result = (api_data, result)
+
+if st.session_state.whatif_result is not None:
+    whatif_customer, result = st.session_state.whatif_result
+    tenures, charges, contracts = (np.array(axis["values"]) for axis in result["axes"])
+    # Indexed [tenure, monthly charges, contract]
+    grid = np.array(result["probabilities"]) * 100
+    # Curves are cut through the grid point closest to the customer
+    tenure_at = int(np.abs(tenures - whatif_customer["tenure"]).argmin())
+    charges_at = int(np.abs(charges - whatif_customer["MonthlyCharges"]).argmin())
+    threshold = result["threshold"] * 100
+
+    st.caption(f"{grid.size:,} combinations scored in one request by model {result['model_version']}. "
+               f"This customer: {result['customer']['probability']:.1%} churn risk.")
+    curve_col1, curve_col2 = st.columns(2)
+    for column, x, curves, title, x_title, marker in (
+            (curve_col1, tenures, grid[:, charges_at, :], f"Churn risk by tenure at ${charges[charges_at]:.0f}/month",
+             "Tenure (months)", whatif_customer["tenure"]),
+            (curve_col2, charges, grid[tenure_at, :, :], f"Churn risk by monthly charges at {tenures[tenure_at]} months",
+             "Monthly charges ($)", whatif_customer["MonthlyCharges"])):
+        fig = go.Figure([go.Scatter(x=x, y=curves[:, position], mode="lines", name=contract_type)
+                         for position, contract_type in enumerate(contracts)])
+        fig.add_hline(y=threshold, line_dash="dot", line_color="#ef4444", annotation_text="Churn threshold")
+        fig.add_vline(x=marker, line_dash="dash", line_color="#6b7280")
+        fig.update_layout(height=350, margin=dict(l=20, r=20, t=40, b=20), title=title,
+                          xaxis_title=x_title, yaxis_title="Churn probability (%)", yaxis=dict(range=[0, 100]))
+        column.plotly_chart(fig, use_container_width=True)
+
+    contract_list = contracts.tolist()
+    heatmap_contract = st.selectbox(
+        "Heatmap contract", contract_list,
+        index=contract_list.index(whatif_customer["Contract"]) if whatif_customer["Contract"] in contract_list else 0)
+    fig = go.Figure(go.Heatmap(z=grid[:, :, contract_list.index(heatmap_contract)].T, x=tenures, y=charges,
+                               zmin=0, zmax=100, colorscale="RdYlGn_r", colorbar=dict(title="Churn %"),
+                               hovertemplate="Tenure %{x} months<br>$%{y:.2f}/month<br>%{z:.1f}% churn risk"
+                                             "<extra></extra>"))
+    fig.add_trace(go.Scatter(x=[whatif_customer["tenure"]], y=[whatif_customer["MonthlyCharges"]], mode="markers",
+                             marker=dict(symbol="x", size=14, color="black"), name="This customer"))
+    fig.update_layout(height=450, margin=dict(l=20, r=20, t=40, b=20),
+                      title=f"Churn risk by tenure and monthly charges ({heatmap_contract})",
+                      xaxis_title="Tenure (months)", yaxis_title="Monthly charges ($)")
+    st.plotly_chart(fig, use_container_width=True)
 
 # Footer with additional information
 st.markdown("---")
@@ -655,10 +751,10 @@ with st.sidebar:
     if st.button("🔍 Run Health Check"):
         with st.spinner("Checking system health..."):
             try:
-                # Test basic connection
-                response = requests.get(f"{FASTAPI_URL}/docs", timeout=5)
+                # Test readiness: model loaded and warmed up
+                response = get_session().get(f"{FASTAPI_URL}/ready", timeout=HEALTH_TIMEOUT)
                 if response.status_code == 200:
-                    st.success("✅ FastAPI server is healthy")
+                    st.success(f"✅ FastAPI server is ready (model {response.json().get('model_version', 'unknown')})")
                     
                     # Test prediction endpoint with sample data
                     sample_data = {
@@ -683,13 +779,15 @@ with st.sidebar:
                         "TotalCharges": 540.0
                     }
                     
-                    test_response = requests.post(f"{FASTAPI_URL}/predict", json=sample_data, timeout=10)
+                    test_response = get_session().post(f"{FASTAPI_URL}/predict", json=sample_data, timeout=10)
                     if test_response.status_code == 200:
                         st.success("✅ Prediction endpoint working")
                         result = test_response.json()
                         st.info(f"Sample prediction: {result['prediction']} ({result['probability']:.3f})")
                     else:
                         st.warning("⚠️ Prediction endpoint has issues")
+                elif response.status_code == 503:
+                    st.warning("⏳ FastAPI server is up but still loading the model")
                 else:
                     st.error("❌ FastAPI server not responding correctly")
             except Exception as e:
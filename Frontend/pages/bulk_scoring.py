@@ -0,0 +1,141 @@
+import hashlib
+import io
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from api_client import FASTAPI_URL, score_batch_api_call
+from validation import REQUIRED_COLUMNS, prepare_frame, validate_frame
+
+
+st.set_page_config(page_title="Bulk Churn Scoring", page_icon="📂", layout="wide")
+
+# Records per /predict/batch call; keeps each request and response a few MB at most
+BATCH_SIZE = 2000
+# Rows shown in the on-page preview; the download always has every row
+PREVIEW_ROWS = 1000
+
+RISK_LABELS = ["Low", "Medium", "High"]
+
+
+def risk_levels(probabilities):
+    """Same cut-offs as the single-customer page: below 0.3 Low, below 0.7 Medium, else High"""
+    levels = np.select([probabilities < 0.3, probabilities < 0.7], ["Low", "Medium"], "High").astype(object)
+    levels[np.isnan(probabilities)] = ''
+    return levels
+
+
+@st.cache_data(show_spinner=False)
+def read_upload(data, name):
+    """Parse an uploaded CSV or Excel file; cached on the file contents"""
+    if name.lower().endswith(('.xlsx', '.xls')):
+        return pd.read_excel(io.BytesIO(data))
+    return pd.read_csv(io.BytesIO(data), dtype={'customerID': str})
+
+
+def to_records(df):
+    """JSON-safe records: NaN becomes None"""
+    return df[REQUIRED_COLUMNS].astype(object).where(df[REQUIRED_COLUMNS].notna(), None).to_dict('records')
+
+
+def score_frame(df, progress):
+    """Score the valid rows of df in BATCH_SIZE chunks; returns probabilities, predictions, errors"""
+    probabilities = np.full(len(df), np.nan)
+    predictions = np.full(len(df), '', dtype=object)
+    errors = np.full(len(df), '', dtype=object)
+    for start in range(0, len(df), BATCH_SIZE):
+        chunk = df.iloc[start:start + BATCH_SIZE]
+        columns, error = score_batch_api_call(to_records(chunk))
+        if error:
+            return None, None, None, error
+        rows = slice(start, start + len(chunk))
+        probabilities[rows], predictions[rows], errors[rows] = columns
+        done = min(start + BATCH_SIZE, len(df))
+        progress.progress(done / len(df), text=f"Scored {done:,} of {len(df):,} customers")
+    return probabilities, predictions, errors, None
+
+
+st.markdown("## 📂 Bulk Churn Scoring")
+st.caption("Upload a customer file with the same columns as the Telco dataset to score every row at once.")
+
+uploaded = st.file_uploader("Customer file (CSV or Excel)", type=["csv", "xlsx", "xls"])
+if uploaded is None:
+    st.info(f"Required columns: {', '.join(REQUIRED_COLUMNS)}")
+    st.stop()
+
+data = uploaded.getvalue()
+file_id = hashlib.sha256(data).hexdigest()
+raw = read_upload(data, uploaded.name)
+
+missing_columns = [col for col in REQUIRED_COLUMNS if col not in raw.columns]
+if missing_columns:
+    st.error(f"❌ Missing columns: {', '.join(missing_columns)}")
+    st.stop()
+
+customers = prepare_frame(raw)
+validation_errors = validate_frame(customers)
+valid = validation_errors == ''
+
+col1, col2, col3 = st.columns(3)
+col1.metric("Rows", f"{len(customers):,}")
+col2.metric("Valid", f"{int(valid.sum()):,}")
+col3.metric("Invalid", f"{int((~valid).sum()):,}")
+
+if not valid.all():
+    with st.expander(f"⚠️ {int((~valid).sum()):,} rows failed validation and will not be scored"):
+        st.dataframe(raw.loc[~valid].assign(Validation_Error=validation_errors[~valid]).head(PREVIEW_ROWS))
+
+# Results are kept per file so reruns (e.g. widget clicks) don't rescore
+scored = st.session_state.get('bulk_results')
+if scored is not None and scored[0] != file_id:
+    scored = None
+
+if scored is None and st.button("🎯 Score customers", disabled=not valid.any()):
+    progress = st.progress(0.0, text="Sending customers to the prediction service...")
+    valid_customers = customers.loc[valid]
+    probabilities, predictions, errors, error = score_frame(valid_customers, progress)
+    if error:
+        st.error(f"{error}\n\nPrediction service: {FASTAPI_URL}")
+        st.stop()
+
+    result = raw.copy()
+    result['Churn_Prediction'] = ''
+    result['Churn_Probability'] = np.nan
+    result['Error'] = validation_errors
+    result.loc[valid, 'Churn_Prediction'] = predictions
+    result.loc[valid, 'Churn_Probability'] = probabilities
+    result.loc[valid, 'Error'] = errors
+    result['Risk_Level'] = risk_levels(result['Churn_Probability'].to_numpy(dtype=float))
+    scored = (file_id, result, result.to_csv(index=False))
+    st.session_state.bulk_results = scored
+
+if scored is not None:
+    _, result, result_csv = scored
+    scored_rows = result['Churn_Probability'].notna()
+    st.success(f"✅ Scored {int(scored_rows.sum()):,} customers")
+
+    chart_col1, chart_col2 = st.columns([2, 1])
+    with chart_col1:
+        fig = px.histogram(result.loc[scored_rows], x='Churn_Probability', nbins=50,
+                           title="Churn probability distribution")
+        fig.update_layout(height=350, margin=dict(l=20, r=20, t=40, b=20))
+        st.plotly_chart(fig, use_container_width=True)
+    with chart_col2:
+        breakdown = result.loc[scored_rows, 'Risk_Level'].value_counts().reindex(RISK_LABELS, fill_value=0)
+        fig = px.pie(values=breakdown.values, names=breakdown.index, title="Risk level breakdown",
+                     color=breakdown.index,
+                     color_discrete_map={"Low": "#22c55e", "Medium": "#f59e0b", "High": "#ef4444"})
+        fig.update_layout(height=350, margin=dict(l=20, r=20, t=40, b=20))
+        st.plotly_chart(fig, use_container_width=True)
+
+    st.markdown(f"#### Highest-risk customers (top {PREVIEW_ROWS:,})")
+    st.dataframe(result.loc[scored_rows].nlargest(PREVIEW_ROWS, 'Churn_Probability'), use_container_width=True)
+
+    st.download_button(
+        label="📥 Download scored file (CSV)",
+        data=result_csv,
+        file_name=f"churn_scores_{uploaded.name.rsplit('.', 1)[0]}.csv",
+        mime="text/csv",
+    )
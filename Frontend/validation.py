@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+
+REQUIRED_COLUMNS = ['gender', 'SeniorCitizen', 'Partner', 'Dependents', 'tenure', 'PhoneService',
+                    'MultipleLines', 'InternetService', 'OnlineSecurity', 'OnlineBackup',
+                    'DeviceProtection', 'TechSupport', 'StreamingTV', 'StreamingMovies', 'Contract',
+                    'PaperlessBilling', 'PaymentMethod', 'MonthlyCharges', 'TotalCharges']
+
+NUMERIC_COLUMNS = ['SeniorCitizen', 'tenure', 'MonthlyCharges', 'TotalCharges']
+CATEGORICAL_COLUMNS = [col for col in REQUIRED_COLUMNS if col not in NUMERIC_COLUMNS]
+
+
+# Function to validate input data
+def validate_inputs(data):
+    """Validate input data before sending to API"""
+    errors = []
+    
+    if data['tenure'] < 0 or data['tenure'] > 100:
+        errors.append("Tenure must be between 0 and 100 months")
+    
+    if data['MonthlyCharges'] <= 0 or data['MonthlyCharges'] > 1000:
+        errors.append("Monthly charges must be between 0 and 1000")
+    
+    if data['TotalCharges'] < 0 or data['TotalCharges'] > 100000:
+        errors.append("Total charges must be between 0 and 100,000")
+    
+    # Removed the validation that checked if TotalCharges < MonthlyCharges since it's now auto-calculated
+    
+    return errors
+
+
+def prepare_frame(df):
+    """Numeric columns as numbers (blank TotalCharges become 0.0, as in training), text stripped"""
+    df = df.copy()
+    if 'TotalCharges' in df:
+        df['TotalCharges'] = df['TotalCharges'].replace({" ": "0.0", "": "0.0"})
+    for col in NUMERIC_COLUMNS:
+        if col in df:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def validate_frame(df):
+    """Vectorised validate_inputs over a prepared DataFrame.
+
+    Returns one '; '-joined error string per row, empty for valid rows.
+    """
+    checks = [
+        (df['tenure'].isna() | (df['tenure'] < 0) | (df['tenure'] > 100),
+         "Tenure must be between 0 and 100 months"),
+        (df['MonthlyCharges'].isna() | (df['MonthlyCharges'] <= 0) | (df['MonthlyCharges'] > 1000),
+         "Monthly charges must be between 0 and 1000"),
+        (df['TotalCharges'].isna() | (df['TotalCharges'] < 0) | (df['TotalCharges'] > 100000),
+         "Total charges must be between 0 and 100,000"),
+        (df['SeniorCitizen'].isna() | ~df['SeniorCitizen'].isin([0, 1]),
+         "SeniorCitizen must be 0 or 1"),
+        (df[CATEGORICAL_COLUMNS].isna().any(axis=1), "Missing categorical values"),
+    ]
+    failed = np.column_stack([mask.to_numpy() for mask, _ in checks])
+    messages = np.array([message for _, message in checks], dtype=object)
+
+    errors = np.full(len(df), '', dtype=object)
+    for row in np.flatnonzero(failed.any(axis=1)):
+        errors[row] = '; '.join(messages[failed[row]])
+    return pd.Series(errors, index=df.index)